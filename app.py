@@ -1,24 +1,195 @@
-from flask import Flask, render_template, request, redirect, url_for, session, flash, jsonify, send_file, make_response
+from flask import Flask, render_template, request, redirect, url_for, session, flash, jsonify, send_file, make_response, g, Response
 import sqlite3
+import queue
+from contextlib import contextmanager
+from collections import OrderedDict
 import json
+import re
+import csv
 from werkzeug.security import generate_password_hash, check_password_hash
+from werkzeug.middleware.proxy_fix import ProxyFix
 import os
-from datetime import datetime
+from datetime import datetime, timedelta
 import uuid
-from io import BytesIO
-from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import letter
-from reportlab.lib.units import inch
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Image
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.enums import TA_CENTER, TA_LEFT
+import base64
+import hashlib
+import time
+import threading
+import zipfile
+import multiprocessing
+from difflib import SequenceMatcher
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, as_completed, wait
+from io import StringIO, TextIOWrapper
+import certificate
+import metrics
 
 app = Flask(__name__)
 app.secret_key = 'clearance_system_secret_key_2025'
+app.config['DATABASE'] = os.environ.get('CLEARANCE_DB', 'clearance_system.db')
+app.config['DB_POOL_SIZE'] = 8
+app.config['PDF_WORKERS'] = os.cpu_count() or 2
+app.config['PDF_CACHE_DIR'] = os.environ.get('CLEARANCE_PDF_CACHE', 'pdf_cache')
+app.config['PDF_CACHE_MAX_BYTES'] = 256 * 1024 * 1024
+app.config['PDF_CACHE_RESCAN_SECONDS'] = 300
+app.config['DASHBOARD_CACHE_SIZE'] = 20000
+app.config['EVENT_KEEPALIVE_SECONDS'] = 15
+app.config['IMPORT_BATCH_SIZE'] = 500
+# Any werkzeug method string, spelled out in full so stored hashes can be
+# compared against it (e.g. 'pbkdf2:sha256:100000' or 'scrypt:16384:8:1')
+app.config['PASSWORD_HASH_METHOD'] = os.environ.get('CLEARANCE_PASSWORD_HASH', 'scrypt:32768:8:1')
+# Login attempts allowed as (burst, refill per second), set in the
+# environment as 'burst,refill'. The per-IP limit has to admit a whole class
+# logging in from behind one campus NAT. Failed attempts on a username are
+# limited per client address, so nobody can lock out someone else's account.
+app.config['LOGIN_RATE_PER_IP'] = tuple(map(float, os.environ.get('CLEARANCE_LOGIN_RATE_PER_IP', '600,20').split(',')))
+app.config['LOGIN_RATE_PER_USERNAME'] = tuple(map(float, os.environ.get('CLEARANCE_LOGIN_RATE_PER_USERNAME', '5,0.083').split(',')))
+# Number of reverse proxies in front of the app (one on Replit). Their
+# X-Forwarded-For/-Proto headers are trusted, so request.remote_addr is the
+# client's address, which the per-IP login throttle keys on. Leave it at 0
+# when clients connect directly, or they could spoof their address.
+app.config['TRUSTED_PROXIES'] = int(os.environ.get('CLEARANCE_TRUSTED_PROXIES', '0'))
+if app.config['TRUSTED_PROXIES']:
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=app.config['TRUSTED_PROXIES'],
+                            x_proto=app.config['TRUSTED_PROXIES'])
+# Requests slower than this, or running at least this many SQL statements,
+# are logged as warnings
+app.config['SLOW_REQUEST_SECONDS'] = float(os.environ.get('CLEARANCE_SLOW_REQUEST_SECONDS', '0.5'))
+app.config['SQL_STATEMENT_WARNING'] = 100
+# Bearer token accepted on /metrics in addition to an admin session
+app.config['METRICS_TOKEN'] = os.environ.get('CLEARANCE_METRICS_TOKEN')
+# Background jobs: worker threads per process, where result files go, how
+# often a process marks its running jobs alive, how long without that before
+# a job counts as interrupted, and how long finished jobs are kept
+app.config['JOB_WORKERS'] = 2
+app.config['JOB_RESULTS_DIR'] = os.environ.get('CLEARANCE_JOB_DIR', 'job_results')
+app.config['JOB_POLL_SECONDS'] = 2
+app.config['JOB_PROGRESS_INTERVAL'] = 0.5
+app.config['JOB_HEARTBEAT_SECONDS'] = 10
+app.config['JOB_STALE_SECONDS'] = 60
+app.config['JOB_RETENTION_SECONDS'] = 24 * 3600
+
+# Database connections
+# Connections are opened once and kept in a small pool instead of being
+# opened and closed by every route. Each request borrows one through
+# get_db() and gives it back when the app context tears down.
+_db_pool = queue.LifoQueue()
+
+class TracedCursor(sqlite3.Cursor):
+    """Cursor that reports its statements and the time spent in them to
+    record_sql(), for the per-request SQL metrics."""
+    
+    def execute(self, sql, parameters=()):
+        started = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            record_sql(time.perf_counter() - started)
+    
+    def executemany(self, sql, seq_of_parameters):
+        started = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            record_sql(time.perf_counter() - started)
+    
+    def fetchone(self):
+        started = time.perf_counter()
+        try:
+            return super().fetchone()
+        finally:
+            record_sql(time.perf_counter() - started, statements=0)
+    
+    def fetchmany(self, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return super().fetchmany(*args, **kwargs)
+        finally:
+            record_sql(time.perf_counter() - started, statements=0)
+    
+    def fetchall(self):
+        started = time.perf_counter()
+        try:
+            return super().fetchall()
+        finally:
+            record_sql(time.perf_counter() - started, statements=0)
+
+class PooledConnection(sqlite3.Connection):
+    database_path = None
+    
+    def cursor(self, factory=TracedCursor):
+        return super().cursor(factory)
+    
+    # Connection.execute() would create a plain cursor, so go through
+    # cursor() to keep every statement traced
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+    
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+def connect_db():
+    path = os.path.abspath(app.config['DATABASE'])
+    conn = sqlite3.connect(
+        path,
+        check_same_thread=False,
+        cached_statements=256,
+        factory=PooledConnection,
+    )
+    conn.database_path = path
+    # WAL lets student reads continue while an admin write is in progress
+    conn.execute('PRAGMA journal_mode = WAL')
+    conn.execute('PRAGMA synchronous = NORMAL')
+    conn.execute('PRAGMA busy_timeout = 5000')
+    conn.execute('PRAGMA mmap_size = 67108864')
+    conn.execute('PRAGMA temp_store = MEMORY')
+    # Make REPLACE conflict resolution fire delete triggers too
+    conn.execute('PRAGMA recursive_triggers = ON')
+    return conn
+
+def acquire_db():
+    path = os.path.abspath(app.config['DATABASE'])
+    while True:
+        try:
+            conn = _db_pool.get_nowait()
+        except queue.Empty:
+            return connect_db()
+        if conn.database_path == path:
+            return conn
+        # The database was reconfigured since this connection was pooled
+        conn.close()
+
+def release_db(conn):
+    if conn.in_transaction:
+        conn.rollback()
+    if _db_pool.qsize() >= app.config['DB_POOL_SIZE']:
+        conn.close()
+    else:
+        _db_pool.put(conn)
+
+@contextmanager
+def db_connection():
+    """Borrow a pooled connection outside of a request, e.g. in a
+    streaming response generator or a background thread."""
+    conn = acquire_db()
+    try:
+        yield conn
+    finally:
+        release_db(conn)
+
+def get_db():
+    if 'db' not in g:
+        g.db = acquire_db()
+    return g.db
+
+@app.teardown_appcontext
+def teardown_db(exception):
+    conn = g.pop('db', None)
+    if conn is not None:
+        release_db(conn)
 
 # Database setup
 def init_db():
-    conn = sqlite3.connect('clearance_system.db')
+    conn = connect_db()
     cursor = conn.cursor()
     
     # Users table
@@ -83,11 +254,1073 @@ def init_db():
     
     # Insert single admin user
     cursor.execute('INSERT OR IGNORE INTO users (username, password, name, user_type) VALUES (?, ?, ?, ?)',
-                  ('ronronadmin', generate_password_hash('ronron1234'), 'Ron', 'admin'))
+                  ('ronronadmin', hash_password('ronron1234'), 'Ron', 'admin'))
     
     conn.commit()
+    
+    migrate_db(conn)
     conn.close()
 
+# Schema migrations
+# Each migration upgrades the schema by one version. The current version is
+# stored in PRAGMA user_version, so existing database files are upgraded in
+# place the next time init_db runs. Only ever append to MIGRATIONS.
+def migration_add_indexes(cursor):
+    # Remove duplicate rows left by earlier versions before adding unique indexes
+    cursor.execute('''
+        DELETE FROM student_requirements
+        WHERE id NOT IN (
+            SELECT MAX(id) FROM student_requirements GROUP BY student_id, requirement_id
+        )
+    ''')
+    cursor.execute('''
+        DELETE FROM clearances
+        WHERE id NOT IN (SELECT MAX(id) FROM clearances GROUP BY student_id)
+    ''')
+    
+    cursor.execute('''
+        CREATE UNIQUE INDEX IF NOT EXISTS ux_student_requirements_student_requirement
+        ON student_requirements (student_id, requirement_id)
+    ''')
+    # Covering index for per-student status lookups and completed counts
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_student_requirements_student_completed
+        ON student_requirements (student_id, completed, requirement_id)
+    ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_student_requirements_requirement
+        ON student_requirements (requirement_id, completed)
+    ''')
+    cursor.execute('''
+        CREATE UNIQUE INDEX IF NOT EXISTS ux_clearances_student
+        ON clearances (student_id)
+    ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_submitted_clearances_student
+        ON submitted_clearances (student_id)
+    ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_submitted_clearances_student_number
+        ON submitted_clearances (student_number)
+    ''')
+    # Roster listing filters on user_type and orders by (name, id)
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_users_type_name
+        ON users (user_type, name, id)
+    ''')
+
+def migration_index_submitted_names(cursor):
+    # Lets the CSV export read submitted clearances in name order without a sort
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_submitted_clearances_student_name
+        ON submitted_clearances (student_name)
+    ''')
+
+def migration_completed_counts(cursor):
+    # users.completed_count mirrors the number of completed student_requirements
+    # rows for each student and is kept current by triggers, so eligibility
+    # checks read one column instead of aggregating student_requirements
+    cursor.execute('ALTER TABLE users ADD COLUMN completed_count INTEGER NOT NULL DEFAULT 0')
+    cursor.execute('''
+        UPDATE users SET completed_count = (
+            SELECT COUNT(*) FROM student_requirements sr
+            WHERE sr.student_id = users.id AND sr.completed = 1
+        )
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_student_requirements_count_insert
+        AFTER INSERT ON student_requirements WHEN NEW.completed
+        BEGIN
+            UPDATE users SET completed_count = completed_count + 1 WHERE id = NEW.student_id;
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_student_requirements_count_delete
+        AFTER DELETE ON student_requirements WHEN OLD.completed
+        BEGIN
+            UPDATE users SET completed_count = completed_count - 1 WHERE id = OLD.student_id;
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_student_requirements_count_update
+        AFTER UPDATE OF student_id, completed ON student_requirements
+        WHEN OLD.completed IS NOT NEW.completed OR OLD.student_id IS NOT NEW.student_id
+        BEGIN
+            UPDATE users SET completed_count = completed_count - 1 WHERE id = OLD.student_id AND OLD.completed;
+            UPDATE users SET completed_count = completed_count + 1 WHERE id = NEW.student_id AND NEW.completed;
+        END
+    ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_users_type_completed
+        ON users (user_type, completed_count)
+    ''')
+
+def migration_change_log(cursor):
+    # Every change to a student's roster entry or to the requirement catalog
+    # gets a monotonically increasing revision, so the admin dashboard can
+    # ask for just the students that changed since the revision it last saw
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS change_log (
+            rev INTEGER PRIMARY KEY AUTOINCREMENT,
+            entity TEXT NOT NULL,
+            student_id INTEGER
+        )
+    ''')
+    for event in ('INSERT', 'UPDATE', 'DELETE'):
+        row = 'OLD' if event == 'DELETE' else 'NEW'
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_student_requirements_log_{event.lower()}
+            AFTER {event} ON student_requirements
+            BEGIN
+                INSERT INTO change_log (entity, student_id) VALUES ('student_requirements', {row}.student_id);
+            END
+        ''')
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_requirements_log_{event.lower()}
+            AFTER {event} ON requirements
+            BEGIN
+                INSERT INTO change_log (entity, student_id) VALUES ('requirements', NULL);
+            END
+        ''')
+    for event in ('INSERT', 'DELETE'):
+        row = 'OLD' if event == 'DELETE' else 'NEW'
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_submitted_clearances_log_{event.lower()}
+            AFTER {event} ON submitted_clearances
+            BEGIN
+                INSERT INTO change_log (entity, student_id) VALUES ('submitted_clearances', {row}.student_id);
+            END
+        ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_users_log_insert
+        AFTER INSERT ON users WHEN NEW.user_type = 'student'
+        BEGIN
+            INSERT INTO change_log (entity, student_id) VALUES ('users', NEW.id);
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_users_log_update
+        AFTER UPDATE OF username, name, course, year, major, section ON users
+        WHEN NEW.user_type = 'student'
+        BEGIN
+            INSERT INTO change_log (entity, student_id) VALUES ('users', NEW.id);
+        END
+    ''')
+
+def migration_student_search(cursor):
+    # Trigram full-text index over student numbers and names. It is an
+    # external-content table over users, so it stores only the index, and
+    # the triggers below keep it in step with student rows.
+    cursor.execute('''
+        CREATE VIRTUAL TABLE IF NOT EXISTS users_search
+        USING fts5(username, name, content='users', content_rowid='id', tokenize='trigram')
+    ''')
+    cursor.execute('''
+        INSERT INTO users_search (rowid, username, name)
+        SELECT id, username, name FROM users WHERE user_type = 'student'
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_users_search_insert
+        AFTER INSERT ON users WHEN NEW.user_type = 'student'
+        BEGIN
+            INSERT INTO users_search (rowid, username, name) VALUES (NEW.id, NEW.username, NEW.name);
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_users_search_delete
+        AFTER DELETE ON users WHEN OLD.user_type = 'student'
+        BEGIN
+            INSERT INTO users_search (users_search, rowid, username, name)
+            VALUES ('delete', OLD.id, OLD.username, OLD.name);
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_users_search_update
+        AFTER UPDATE OF username, name ON users WHEN NEW.user_type = 'student'
+        BEGIN
+            INSERT INTO users_search (users_search, rowid, username, name)
+            VALUES ('delete', OLD.id, OLD.username, OLD.name);
+            INSERT INTO users_search (rowid, username, name) VALUES (NEW.id, NEW.username, NEW.name);
+        END
+    ''')
+
+def migration_progress_summaries(cursor):
+    # Summary tables for the progress report, maintained by triggers so the
+    # report never aggregates student_requirements. requirement_progress
+    # counts completed rows per requirement. group_progress keeps, per
+    # course/year/section, the number of students, how many have submitted
+    # a clearance, and the sum of their completed_count. Submitting removes
+    # a student's requirement rows, so completed covers pending students only.
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS requirement_progress (
+            requirement_id INTEGER PRIMARY KEY,
+            completed INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS group_progress (
+            course TEXT NOT NULL,
+            year INTEGER NOT NULL,
+            section TEXT NOT NULL,
+            students INTEGER NOT NULL DEFAULT 0,
+            cleared INTEGER NOT NULL DEFAULT 0,
+            completed INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (course, year, section)
+        )
+    ''')
+    cursor.execute('''
+        INSERT INTO requirement_progress (requirement_id, completed)
+        SELECT requirement_id, COUNT(*) FROM student_requirements
+        WHERE completed = 1 GROUP BY requirement_id
+    ''')
+    cursor.execute('''
+        INSERT INTO group_progress (course, year, section, students, cleared, completed)
+        SELECT COALESCE(u.course, ''), COALESCE(u.year, 0), COALESCE(u.section, ''),
+               COUNT(*), SUM(EXISTS (SELECT 1 FROM submitted_clearances sc WHERE sc.student_id = u.id)),
+               SUM(u.completed_count)
+        FROM users u WHERE u.user_type = 'student'
+        GROUP BY 1, 2, 3
+    ''')
+    
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_student_requirements_progress_insert
+        AFTER INSERT ON student_requirements WHEN NEW.completed
+        BEGIN
+            INSERT INTO requirement_progress (requirement_id, completed) VALUES (NEW.requirement_id, 1)
+            ON CONFLICT (requirement_id) DO UPDATE SET completed = completed + 1;
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_student_requirements_progress_delete
+        AFTER DELETE ON student_requirements WHEN OLD.completed
+        BEGIN
+            UPDATE requirement_progress SET completed = completed - 1 WHERE requirement_id = OLD.requirement_id;
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_student_requirements_progress_update
+        AFTER UPDATE OF requirement_id, completed ON student_requirements
+        WHEN OLD.completed IS NOT NEW.completed OR OLD.requirement_id IS NOT NEW.requirement_id
+        BEGIN
+            UPDATE requirement_progress SET completed = completed - 1
+            WHERE requirement_id = OLD.requirement_id AND OLD.completed;
+            INSERT INTO requirement_progress (requirement_id, completed)
+            SELECT NEW.requirement_id, 1 WHERE NEW.completed
+            ON CONFLICT (requirement_id) DO UPDATE SET completed = completed + 1;
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_requirements_progress_delete
+        AFTER DELETE ON requirements
+        BEGIN
+            DELETE FROM requirement_progress WHERE requirement_id = OLD.id;
+        END
+    ''')
+    
+    group = "COALESCE({row}.course, ''), COALESCE({row}.year, 0), COALESCE({row}.section, '')"
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_users_progress_insert
+        AFTER INSERT ON users WHEN NEW.user_type = 'student'
+        BEGIN
+            INSERT INTO group_progress (course, year, section, students, completed)
+            VALUES ({group.format(row='NEW')}, 1, NEW.completed_count)
+            ON CONFLICT (course, year, section) DO UPDATE SET
+                students = students + 1, completed = completed + excluded.completed;
+        END
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_users_progress_delete
+        AFTER DELETE ON users WHEN OLD.user_type = 'student'
+        BEGIN
+            UPDATE group_progress SET
+                students = students - 1,
+                cleared = cleared - EXISTS (SELECT 1 FROM submitted_clearances WHERE student_id = OLD.id),
+                completed = completed - OLD.completed_count
+            WHERE (course, year, section) = ({group.format(row='OLD')});
+        END
+    ''')
+    # Toggling a requirement only changes completed_count within a group
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_users_progress_count
+        AFTER UPDATE OF completed_count ON users
+        WHEN NEW.user_type = 'student' AND OLD.completed_count != NEW.completed_count
+            AND ({group.format(row='OLD')}) IS ({group.format(row='NEW')})
+        BEGIN
+            UPDATE group_progress SET completed = completed - OLD.completed_count + NEW.completed_count
+            WHERE (course, year, section) = ({group.format(row='NEW')});
+        END
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_users_progress_move
+        AFTER UPDATE OF course, year, section ON users
+        WHEN NEW.user_type = 'student' AND ({group.format(row='OLD')}) IS NOT ({group.format(row='NEW')})
+        BEGIN
+            UPDATE group_progress SET
+                students = students - 1,
+                cleared = cleared - EXISTS (SELECT 1 FROM submitted_clearances WHERE student_id = OLD.id),
+                completed = completed - OLD.completed_count
+            WHERE (course, year, section) = ({group.format(row='OLD')});
+            INSERT INTO group_progress (course, year, section, students, cleared, completed)
+            VALUES ({group.format(row='NEW')}, 1,
+                    EXISTS (SELECT 1 FROM submitted_clearances WHERE student_id = NEW.id), NEW.completed_count)
+            ON CONFLICT (course, year, section) DO UPDATE SET
+                students = students + 1,
+                cleared = cleared + excluded.cleared,
+                completed = completed + excluded.completed;
+        END
+    ''')
+    # A student counts as cleared once, however many submitted rows they have
+    for event, row, delta in (('INSERT', 'NEW', '+'), ('DELETE', 'OLD', '-')):
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_submitted_clearances_progress_{event.lower()}
+            AFTER {event} ON submitted_clearances
+            WHEN NOT EXISTS (
+                SELECT 1 FROM submitted_clearances WHERE student_id = {row}.student_id AND id != {row}.id
+            )
+            BEGIN
+                UPDATE group_progress SET cleared = cleared {delta} 1
+                WHERE (course, year, section) = (
+                    SELECT {group.format(row='u')} FROM users u WHERE u.id = {row}.student_id
+                );
+            END
+        ''')
+
+def migration_clearance_requirements(cursor):
+    # Archived requirements get their own rows instead of a JSON array in
+    # submitted_clearances.completed_requirements, so archiving and undo are
+    # plain INSERT ... SELECT statements and reports can join on them. The
+    # name is kept because the requirement itself may be deleted later.
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS submitted_clearance_requirements (
+            clearance_id INTEGER NOT NULL,
+            name TEXT NOT NULL,
+            requirement_id INTEGER,
+            PRIMARY KEY (clearance_id, name),
+            FOREIGN KEY (clearance_id) REFERENCES submitted_clearances (id)
+        ) WITHOUT ROWID
+    ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_submitted_clearance_requirements_requirement
+        ON submitted_clearance_requirements (requirement_id)
+    ''')
+    cursor.execute('''
+        INSERT OR IGNORE INTO submitted_clearance_requirements (clearance_id, name, requirement_id)
+        SELECT sc.id, j.value, (SELECT r.id FROM requirements r WHERE r.name = j.value)
+        FROM submitted_clearances sc,
+             json_each(CASE WHEN json_valid(sc.completed_requirements) THEN sc.completed_requirements ELSE '[]' END) j
+        WHERE j.type = 'text'
+    ''')
+    cursor.execute('ALTER TABLE submitted_clearances DROP COLUMN completed_requirements')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_submitted_clearances_requirements_delete
+        AFTER DELETE ON submitted_clearances
+        BEGIN
+            DELETE FROM submitted_clearance_requirements WHERE clearance_id = OLD.id;
+        END
+    ''')
+
+def migration_jobs(cursor):
+    # Queue for background jobs, see the Background jobs section. Times use
+    # the same text format as submitted_date, so they compare as strings.
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS jobs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            kind TEXT NOT NULL,
+            params TEXT NOT NULL DEFAULT '{}',
+            status TEXT NOT NULL DEFAULT 'queued',
+            progress INTEGER NOT NULL DEFAULT 0,
+            total INTEGER,
+            message TEXT,
+            result_name TEXT,
+            result_type TEXT,
+            created_by INTEGER,
+            created_at TEXT NOT NULL,
+            started_at TEXT,
+            updated_at TEXT,
+            finished_at TEXT,
+            FOREIGN KEY (created_by) REFERENCES users (id)
+        )
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, id)')
+
+# Revisions kept in change_log. Clients further behind reload the roster.
+CHANGE_LOG_KEEP = 50000
+
+def migration_trim_change_log(cursor):
+    # change_log was only pruned by clear-all, and bulk operations add a row
+    # per student requirement. Every 1000th revision now drops rows older
+    # than the last CHANGE_LOG_KEEP, which keeps the trim off most inserts.
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_change_log_trim
+        AFTER INSERT ON change_log WHEN NEW.rev % 1000 = 0
+        BEGIN
+            DELETE FROM change_log WHERE rev <= NEW.rev - {CHANGE_LOG_KEEP};
+        END
+    ''')
+    cursor.execute(f'''
+        DELETE FROM change_log
+        WHERE rev <= (SELECT COALESCE(MAX(rev), 0) FROM change_log) - {CHANGE_LOG_KEEP}
+    ''')
+
+def migration_settings(cursor):
+    # The certificate signature used to be written onto every clearances
+    # row, but a student only has one once a submission is undone, so
+    # submissions normally stored none. It is now one site-wide setting.
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS settings (
+            key TEXT PRIMARY KEY,
+            value TEXT
+        )
+    ''')
+    cursor.execute('''
+        INSERT OR IGNORE INTO settings (key, value)
+        SELECT 'signature_template', signature_template FROM clearances
+        WHERE signature_template IS NOT NULL LIMIT 1
+    ''')
+
+MIGRATIONS = [
+    migration_add_indexes,
+    migration_index_submitted_names,
+    migration_completed_counts,
+    migration_change_log,
+    migration_student_search,
+    migration_progress_summaries,
+    migration_clearance_requirements,
+    migration_jobs,
+    migration_trim_change_log,
+    migration_settings,
+]
+
+def migrate_db(conn):
+    version = conn.execute('PRAGMA user_version').fetchone()[0]
+    for number, migration in enumerate(MIGRATIONS[version:], start=version + 1):
+        conn.execute('BEGIN')
+        try:
+            migration(conn.cursor())
+            conn.execute(f'PRAGMA user_version = {number}')
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+# Query helpers
+def build_student_filter(filters):
+    """Build the WHERE clause shared by the roster and bulk endpoints.
+    
+    Matches pending students (no submitted clearance) narrowed by the
+    student_number/course/year/major/section values in ``filters``, by
+    ``search`` against student number or name, and to students who
+    completed every requirement when ``eligible`` is set. Raises ValueError
+    if ``filters`` is not a mapping or a value is malformed.
+    """
+    if not isinstance(filters, dict):
+        raise ValueError('filter must be an object')
+    
+    where = '''
+        WHERE u.user_type = 'student'
+        AND u.id NOT IN (SELECT student_id FROM submitted_clearances)
+    '''
+    params = []
+    
+    student_number = str(filters.get('student_number') or '').strip()
+    search = str(filters.get('search') or '').strip()
+    course = str(filters.get('course') or '').strip()
+    year = str(filters.get('year') or '').strip()
+    major = str(filters.get('major') or '').strip()
+    section = str(filters.get('section') or '').strip()
+    eligible = str(filters.get('eligible') or '').strip().lower() in ('1', 'true', 'yes')
+    
+    if student_number:
+        clause, clause_params = search_clause(student_number, 'username')
+        where += ' AND ' + clause
+        params.extend(clause_params)
+    if search:
+        clause, clause_params = search_clause(search)
+        where += ' AND ' + clause
+        params.extend(clause_params)
+    if course:
+        where += ' AND u.course = ?'
+        params.append(course)
+    if year:
+        where += ' AND u.year = ?'
+        params.append(int(year))
+    if major:
+        where += ' AND u.major = ?'
+        params.append(major)
+    if section:
+        where += ' AND u.section = ?'
+        params.append(section)
+    if eligible:
+        # Students who have completed every posted requirement
+        total_reqs = len(get_requirements()[0])
+        if total_reqs:
+            where += ' AND u.completed_count >= ?'
+            params.append(total_reqs)
+        else:
+            where += ' AND 0'
+    
+    return where, params
+
+def fts_phrase(text):
+    return '"' + text.replace('"', '""') + '"'
+
+def search_clause(text, column=None):
+    """Return (sql, params) matching students whose number or name (or just
+    ``column``) contains every word of ``text``.
+    
+    Words of three or more characters are looked up in the users_search
+    trigram index. The trigram tokenizer cannot match shorter strings, so
+    those fall back to LIKE.
+    """
+    words = text.split()
+    indexed = [word for word in words if len(word) >= 3]
+    clauses, params = [], []
+    if indexed:
+        query = ' AND '.join(fts_phrase(word) for word in indexed)
+        if column:
+            query = f'{column} : ({query})'
+        clauses.append('u.id IN (SELECT rowid FROM users_search WHERE users_search MATCH ?)')
+        params.append(query)
+    for word in words:
+        if len(word) < 3:
+            if column:
+                clauses.append(f'u.{column} LIKE ?')
+                params.append(f'%{word}%')
+            else:
+                clauses.append('(u.username LIKE ? OR u.name LIKE ?)')
+                params.extend([f'%{word}%', f'%{word}%'])
+    return '(' + ' AND '.join(clauses) + ')', params
+
+def trigrams(text):
+    text = text.lower().replace(' ', '')
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+def name_similarity(text, name):
+    # Compare against the whole name and against its first words, so a
+    # query for a first and last name is not penalised for middle names
+    name = name.lower()
+    words = text.split()
+    leading = ' '.join(name.split()[:len(words)])
+    return max(SequenceMatcher(None, text, name).ratio(), SequenceMatcher(None, text, leading).ratio())
+
+def search_students(cursor, text, limit, fuzzy=True):
+    """Return up to ``limit`` students matching ``text`` as dicts.
+    
+    Students whose number or name contains every word come first, with
+    prefix matches ahead of the rest. With ``fuzzy`` set and room left,
+    names that are close to the query are added too, which tolerates typos
+    such as 'Jhon Santso' for 'John Santos'. Student numbers only match
+    exactly, since every number shares most of its trigrams with the rest.
+    """
+    columns = '''
+        SELECT u.id, u.username, u.name, u.course, u.year, u.major, u.section,
+               EXISTS (SELECT 1 FROM submitted_clearances sc WHERE sc.student_id = u.id)
+        FROM users u
+    '''
+    clause, params = search_clause(text)
+    cursor.execute(columns + f" WHERE u.user_type = 'student' AND {clause} ORDER BY u.name, u.id LIMIT ?",
+                   params + [limit * 5])
+    lowered = text.lower()
+    rows = sorted(cursor.fetchall(),
+                  key=lambda row: not (row[1].lower().startswith(lowered) or row[2].lower().startswith(lowered)))
+    results = [(row, 'exact') for row in rows[:limit]]
+    
+    query_trigrams = trigrams(text)
+    if fuzzy and len(results) < limit and query_trigrams and not any(char.isdigit() for char in text):
+        seen = {row[0] for row, _ in results}
+        # Names sharing any trigram are candidates; bm25 picks the closest
+        # few hundred and the similarity ratio decides which are kept
+        cursor.execute(columns + '''
+            JOIN (SELECT rowid FROM users_search WHERE users_search MATCH ?
+                  ORDER BY rank LIMIT 200) s ON s.rowid = u.id
+        ''', ('name : (' + ' OR '.join(fts_phrase(gram) for gram in sorted(query_trigrams)) + ')',))
+        lowered = ' '.join(lowered.split())
+        candidates = []
+        for row in cursor.fetchall():
+            if row[0] not in seen:
+                similarity = name_similarity(lowered, row[2])
+                if similarity >= 0.75:
+                    candidates.append((similarity, row))
+        candidates.sort(key=lambda candidate: -candidate[0])
+        results.extend((row, 'fuzzy') for _, row in candidates[:limit - len(results)])
+    
+    return [{
+        'id': row[0],
+        'student_number': row[1],
+        'name': row[2],
+        'course': row[3],
+        'year': row[4],
+        'major': row[5],
+        'section': row[6],
+        'submitted': bool(row[7]),
+        'match': match
+    } for row, match in results]
+
+def chunked(items, size=500):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+# Settings
+def get_setting(cursor, key, default=None):
+    cursor.execute('SELECT value FROM settings WHERE key = ?', (key,))
+    row = cursor.fetchone()
+    return row[0] if row else default
+
+def set_setting(cursor, key, value):
+    cursor.execute('INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)', (key, value))
+
+# Pagination helpers
+MAX_PAGE_SIZE = 200
+
+def encode_cursor(name, row_id):
+    raw = json.dumps([name, row_id]).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        name, row_id = json.loads(raw)
+        return str(name), int(row_id)
+    except (ValueError, TypeError):
+        raise ValueError('Invalid cursor')
+
+def get_page_args():
+    """Return (limit, cursor) from the query string, or (None, None) when
+    the client did not ask for a paginated response."""
+    limit = request.args.get('limit', '').strip()
+    if not limit:
+        return None, None
+    limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+    cursor = request.args.get('cursor', '').strip()
+    return limit, decode_cursor(cursor) if cursor else None
+
+# Change log helpers
+def current_revision(cursor):
+    # sqlite_sequence keeps the last revision even after the log is pruned
+    cursor.execute("SELECT seq FROM sqlite_sequence WHERE name = 'change_log'")
+    row = cursor.fetchone()
+    return row[0] if row else 0
+
+def changed_since(cursor, revision, entities=(), student_id=None):
+    """Whether change_log has a row after ``revision``, optionally only
+    for the given entities or student, or no longer reaches back that far.
+    The caches below use this to notice writes by other server processes."""
+    conditions, params = ['rev > ?'], [revision]
+    if entities:
+        conditions.append(f"entity IN ({','.join('?' * len(entities))})")
+        params.extend(entities)
+    if student_id is not None:
+        conditions.append('student_id = ?')
+        params.append(student_id)
+    cursor.execute(f'''
+        SELECT (SELECT MIN(rev) FROM change_log) > ?
+            OR EXISTS (SELECT 1 FROM change_log WHERE {' AND '.join(conditions)})
+    ''', [revision] + params)
+    return bool(cursor.fetchone()[0])
+
+def prune_change_log(cursor):
+    """Drop all but the newest change_log row. Clients holding an older
+    revision are told to reload the roster."""
+    cursor.execute('DELETE FROM change_log WHERE rev < (SELECT MAX(rev) FROM change_log)')
+
+# Requirements cache
+# The requirement catalog is read by almost every request but only changes
+# when an admin adds, deletes or clears requirements. Those routes call
+# bump_requirements_version() (via notify_requirements_changed()) after
+# committing, which makes the next read in this process reload it. Other
+# processes notice through change_log: the cache remembers the revision it
+# was loaded at and reloads once a requirements change lands after it.
+_requirements_cache = {'version': 0, 'loaded_version': None, 'database': None, 'revision': None,
+                       'requirements': [], 'etag': None}
+_requirements_lock = threading.Lock()
+
+def get_requirements():
+    """Return the cached [{'id', 'name'}] list ordered by name, and its ETag.
+    Callers must not modify the returned list."""
+    database = os.path.abspath(app.config['DATABASE'])
+    cursor = get_db().cursor()
+    # Read the revision before the catalog so nothing committed in between is missed
+    revision = current_revision(cursor)
+    
+    with _requirements_lock:
+        cached = dict(_requirements_cache)
+    if cached['loaded_version'] == cached['version'] and cached['database'] == database:
+        if cached['revision'] == revision or not changed_since(cursor, cached['revision'], ('requirements',)):
+            with _requirements_lock:
+                if _requirements_cache['revision'] == cached['revision']:
+                    _requirements_cache['revision'] = revision
+            return cached['requirements'], cached['etag']
+    version = cached['version']
+    
+    cursor.execute('SELECT id, name FROM requirements ORDER BY name')
+    requirements = [{'id': row[0], 'name': row[1]} for row in cursor.fetchall()]
+    etag = hashlib.sha1(json.dumps(requirements).encode('utf-8')).hexdigest()
+    
+    with _requirements_lock:
+        # Only store the result if nothing changed while we were reading
+        if _requirements_cache['version'] == version:
+            _requirements_cache.update(loaded_version=version, database=database, revision=revision,
+                                       requirements=requirements, etag=etag)
+    return requirements, etag
+
+def bump_requirements_version():
+    with _requirements_lock:
+        _requirements_cache['version'] += 1
+
+# Filter facets cache
+# Distinct course/year/major/section values with pending and cleared
+# counts. Instead of relying on every route to invalidate it, the cache
+# remembers the change_log revision it was computed at and is rebuilt once
+# a users or submitted_clearances change lands after that revision.
+# Requirement toggles do not affect facets, so they only move the watermark.
+_facets_cache = {'database': None, 'revision': None, 'facets': None, 'etag': None}
+_facets_lock = threading.Lock()
+FACET_COLUMNS = ('course', 'year', 'major', 'section')
+
+def get_student_facets():
+    """Return the cached facets dict and its ETag."""
+    database = os.path.abspath(app.config['DATABASE'])
+    cursor = get_db().cursor()
+    revision = current_revision(cursor)
+    
+    with _facets_lock:
+        cached = dict(_facets_cache)
+    if cached['database'] == database and cached['revision'] is not None:
+        if cached['revision'] == revision or not changed_since(cursor, cached['revision'], ('users', 'submitted_clearances')):
+            with _facets_lock:
+                # Nothing relevant changed, so later checks can start from here
+                if _facets_cache['revision'] == cached['revision']:
+                    _facets_cache['revision'] = revision
+            return cached['facets'], cached['etag']
+    
+    # One grouped pass over the students; the roll-up per facet is done here
+    cursor.execute('''
+        SELECT u.course, u.year, u.major, u.section,
+               SUM(sc.student_id IS NULL), SUM(sc.student_id IS NOT NULL)
+        FROM users u
+        LEFT JOIN (SELECT DISTINCT student_id FROM submitted_clearances) sc ON sc.student_id = u.id
+        WHERE u.user_type = 'student'
+        GROUP BY u.course, u.year, u.major, u.section
+    ''')
+    counts = {column: {} for column in FACET_COLUMNS}
+    totals = {'pending': 0, 'cleared': 0}
+    for row in cursor.fetchall():
+        pending, cleared = row[4], row[5]
+        totals['pending'] += pending
+        totals['cleared'] += cleared
+        for column, value in zip(FACET_COLUMNS, row[:4]):
+            entry = counts[column].setdefault(value if value is not None else '', [0, 0])
+            entry[0] += pending
+            entry[1] += cleared
+    
+    facets = {
+        column: [{'value': value, 'pending': entry[0], 'cleared': entry[1]}
+                 for value, entry in sorted(values.items(), key=lambda item: str(item[0]))]
+        for column, values in counts.items()
+    }
+    facets['total'] = totals
+    etag = hashlib.sha1(json.dumps(facets, sort_keys=True).encode('utf-8')).hexdigest()
+    
+    with _facets_lock:
+        _facets_cache.update(database=database, revision=revision, facets=facets, etag=etag)
+    return facets, etag
+
+# Student dashboard cache
+# Rendered /api/student-requirements responses, per student. Entries are
+# tied to the requirement catalog's ETag, and every route that changes a
+# student's requirements or submission state invalidates them through
+# notify_students_changed() after committing. Each student also has
+# a generation number, so a response computed while an invalidation was
+# happening is not stored. Entries also keep the change_log revision they
+# were computed at, so a change to the student committed by another server
+# process is noticed on the next read.
+_dashboard_cache = {'epoch': 0, 'generations': {}, 'entries': OrderedDict()}
+_dashboard_lock = threading.Lock()
+
+def dashboard_cache_token(student_id):
+    with _dashboard_lock:
+        return _dashboard_cache['epoch'], _dashboard_cache['generations'].get(student_id, 0)
+
+def get_cached_dashboard(cursor, student_id, requirements_etag, revision):
+    database = os.path.abspath(app.config['DATABASE'])
+    with _dashboard_lock:
+        entry = _dashboard_cache['entries'].get(student_id)
+        if entry is None or entry[0] != database or entry[1] != requirements_etag:
+            return None
+        _dashboard_cache['entries'].move_to_end(student_id)
+    if entry[2] != revision:
+        if changed_since(cursor, entry[2], student_id=student_id):
+            return None
+        with _dashboard_lock:
+            # Still current, so later checks can start from here
+            if _dashboard_cache['entries'].get(student_id) is entry:
+                _dashboard_cache['entries'][student_id] = entry[:2] + (revision,) + entry[3:]
+    return entry[3], entry[4]
+
+def store_cached_dashboard(student_id, token, requirements_etag, revision, etag, body):
+    database = os.path.abspath(app.config['DATABASE'])
+    with _dashboard_lock:
+        if token != (_dashboard_cache['epoch'], _dashboard_cache['generations'].get(student_id, 0)):
+            return
+        entries = _dashboard_cache['entries']
+        entries[student_id] = (database, requirements_etag, revision, etag, body)
+        entries.move_to_end(student_id)
+        while len(entries) > app.config['DASHBOARD_CACHE_SIZE']:
+            entries.popitem(last=False)
+
+def invalidate_student_dashboards(student_ids=None):
+    """Forget cached dashboards for the given students, or for everyone."""
+    with _dashboard_lock:
+        if student_ids is None:
+            _dashboard_cache['epoch'] += 1
+            _dashboard_cache['generations'].clear()
+            _dashboard_cache['entries'].clear()
+            return
+        generations = _dashboard_cache['generations']
+        for student_id in student_ids:
+            generations[student_id] = generations.get(student_id, 0) + 1
+            _dashboard_cache['entries'].pop(student_id, None)
+
+# Live updates
+# Clients hold a server-sent events stream open on /api/events. Routes call
+# notify_students_changed() / notify_requirements_changed() after
+# committing; these drop the affected cache entries and push a delta to
+# every subscriber: admins see every student, students only themselves.
+_event_subscribers = {}
+_event_lock = threading.Lock()
+EVENT_QUEUE_SIZE = 1000
+
+def subscribe_events(student_id):
+    subscriber = queue.Queue(maxsize=EVENT_QUEUE_SIZE)
+    with _event_lock:
+        _event_subscribers[subscriber] = student_id
+    return subscriber
+
+def unsubscribe_events(subscriber):
+    with _event_lock:
+        _event_subscribers.pop(subscriber, None)
+
+def publish_events(events):
+    """Queue events for interested subscribers. An event with a student_id
+    only goes to admins and that student; others go to everyone."""
+    with _event_lock:
+        subscribers = list(_event_subscribers.items())
+    for subscriber, student_id in subscribers:
+        for event in events:
+            if student_id is not None and event.get('student_id') not in (None, student_id):
+                continue
+            try:
+                subscriber.put_nowait(event)
+            except queue.Full:
+                # A slow client fell behind; make it reload instead
+                while True:
+                    try:
+                        subscriber.get_nowait()
+                    except queue.Empty:
+                        break
+                subscriber.put_nowait({'type': 'reset'})
+                break
+
+def has_event_subscribers():
+    with _event_lock:
+        return bool(_event_subscribers)
+
+def student_events(cursor, student_ids):
+    """Build a 'student' event with the current state of each student."""
+    events = {}
+    student_ids = list(student_ids)
+    for chunk in chunked(student_ids):
+        placeholders = ','.join('?' * len(chunk))
+        cursor.execute('''
+            SELECT u.id, u.completed_count,
+                   EXISTS (SELECT 1 FROM submitted_clearances sc WHERE sc.student_id = u.id)
+            FROM users u WHERE u.id IN (%s)
+        ''' % placeholders, chunk)
+        for row in cursor.fetchall():
+            events[row[0]] = {
+                'type': 'student',
+                'student_id': row[0],
+                'completed_count': row[1],
+                'clearance_submitted': bool(row[2]),
+                'requirements': []
+            }
+        cursor.execute('''
+            SELECT student_id, requirement_id, completed
+            FROM student_requirements WHERE student_id IN (%s)
+        ''' % placeholders, chunk)
+        for row in cursor.fetchall():
+            if row[0] in events:
+                events[row[0]]['requirements'].append({'requirement_id': row[1], 'completed': bool(row[2])})
+    return list(events.values())
+
+def notify_students_changed(student_ids=None):
+    """Call after committing changes to students' requirements or
+    submissions. ``None`` means every student may have changed."""
+    if student_ids is None:
+        invalidate_student_dashboards()
+        publish_events([{'type': 'reset'}])
+        return
+    student_ids = set(student_ids)
+    invalidate_student_dashboards(student_ids)
+    if student_ids and has_event_subscribers():
+        publish_events(student_events(get_db().cursor(), student_ids))
+
+def notify_requirements_changed():
+    """Call after committing changes to the requirement catalog."""
+    bump_requirements_version()
+    publish_events([{'type': 'reset'}])
+
+# Passwords and login throttling
+# Hashing is deliberately expensive, so it all goes through hash_password()
+# and verify_password(), which use the configured method and record how
+# long they take. Hashes made with an older method are upgraded on the next
+# successful login. Attempts are limited per client IP and per username
+# and client IP with token buckets before any hash is checked.
+_auth_stats = {'hash_count': 0, 'hash_seconds': 0.0, 'verify_count': 0, 'verify_seconds': 0.0,
+               'rehash_count': 0, 'throttled_count': 0}
+_login_buckets = {}
+_auth_lock = threading.Lock()
+MAX_LOGIN_BUCKETS = 50000
+
+def record_hash_time(kind, seconds, count=1):
+    with _auth_lock:
+        _auth_stats[kind + '_count'] += count
+        _auth_stats[kind + '_seconds'] += seconds
+
+def hash_password(password):
+    started = time.perf_counter()
+    password_hash = generate_password_hash(password, method=app.config['PASSWORD_HASH_METHOD'])
+    record_hash_time('hash', time.perf_counter() - started)
+    return password_hash
+
+def verify_password(password_hash, password):
+    """Return (matches, needs_rehash) for a stored hash."""
+    started = time.perf_counter()
+    matches = check_password_hash(password_hash, password)
+    record_hash_time('verify', time.perf_counter() - started)
+    return matches, password_hash.split('$', 1)[0] != app.config['PASSWORD_HASH_METHOD']
+
+def take_login_token(key, rate):
+    """Take one attempt from the bucket for key. Returns 0 when allowed,
+    otherwise the number of seconds until the next attempt is."""
+    capacity, refill = rate
+    now = time.monotonic()
+    with _auth_lock:
+        tokens, updated = _login_buckets.get(key, (capacity, now))
+        tokens = min(capacity, tokens + (now - updated) * refill)
+        if tokens < 1:
+            _login_buckets[key] = (tokens, now)
+            _auth_stats['throttled_count'] += 1
+            return (1 - tokens) / refill
+        _login_buckets[key] = (tokens - 1, now)
+        if len(_login_buckets) > MAX_LOGIN_BUCKETS:
+            # Buckets that have been idle long enough to refill can be forgotten
+            for stale in [k for k, (_, t) in _login_buckets.items() if now - t > 3600]:
+                del _login_buckets[stale]
+    return 0
+
+def return_login_token(key, rate):
+    """Give back an attempt taken with take_login_token()."""
+    capacity, _ = rate
+    with _auth_lock:
+        if key in _login_buckets:
+            tokens, updated = _login_buckets[key]
+            _login_buckets[key] = (min(capacity, tokens + 1), updated)
+
+def check_login_rate(username):
+    """Take an attempt from the client's bucket and from the bucket for
+    this username from this client. The latter is given back by
+    login_succeeded(), so only failed attempts count against it, and
+    because it is per client, guessing from one address does not throttle
+    the account's owner anywhere else."""
+    retry_after = take_login_token(('ip', request.remote_addr), app.config['LOGIN_RATE_PER_IP'])
+    if not retry_after:
+        retry_after = take_login_token(('user', username, request.remote_addr), app.config['LOGIN_RATE_PER_USERNAME'])
+    return retry_after
+
+def login_succeeded(username):
+    return_login_token(('user', username, request.remote_addr), app.config['LOGIN_RATE_PER_USERNAME'])
+
+# Metrics
+# Per-route latency, SQL statements and SQL time per request, and PDF render
+# times, served in the Prometheus text format on /metrics. TracedCursor adds
+# every statement to a per-thread tally that each request starts from zero.
+# Requests that are slow or run an unusual number of statements are logged,
+# which is how an N+1 query pattern shows up.
+registry = metrics.Registry()
+REQUEST_SECONDS = registry.histogram(
+    'clearance_http_request_duration_seconds', 'Time to build a response, by route.',
+    ('method', 'route', 'status'))
+SQL_STATEMENTS = registry.histogram(
+    'clearance_sql_statements_per_request', 'SQL statements executed per request, by route.',
+    ('route',), metrics.COUNT_BUCKETS)
+SQL_SECONDS = registry.histogram(
+    'clearance_sql_duration_seconds_per_request', 'Time spent in SQL per request, by route.', ('route',))
+SLOW_REQUESTS = registry.counter(
+    'clearance_slow_requests_total', 'Requests over the time or SQL statement threshold, by route.', ('route',))
+PDF_RENDER_SECONDS = registry.histogram(
+    'clearance_pdf_render_duration_seconds', 'Time to render one clearance PDF.', ('source',))
+PDF_CACHE_REQUESTS = registry.counter(
+    'clearance_pdf_cache_requests_total', 'Single PDF downloads by cache result.', ('result',))
+_sql_tally = threading.local()
+
+def record_sql(seconds, statements=1):
+    if getattr(_sql_tally, 'active', False):
+        _sql_tally.statements += statements
+        _sql_tally.seconds += seconds
+
+@app.before_request
+def start_request_metrics():
+    g.request_started = time.perf_counter()
+    _sql_tally.active = True
+    _sql_tally.statements = 0
+    _sql_tally.seconds = 0.0
+
+@app.after_request
+def record_request_metrics(response):
+    # Streamed bodies are produced after this runs, so their routes only
+    # count the time and SQL needed to start the stream
+    started = g.pop('request_started', None)
+    if started is None:
+        return response
+    elapsed = time.perf_counter() - started
+    statements, sql_seconds = _sql_tally.statements, _sql_tally.seconds
+    _sql_tally.active = False
+    
+    route = request.url_rule.rule if request.url_rule else 'unmatched'
+    REQUEST_SECONDS.observe(elapsed, method=request.method, route=route, status=str(response.status_code))
+    SQL_STATEMENTS.observe(statements, route=route)
+    SQL_SECONDS.observe(sql_seconds, route=route)
+    response.headers['Server-Timing'] = (
+        f'app;dur={elapsed * 1000:.1f}, sql;dur={sql_seconds * 1000:.1f};desc="{statements} statements"')
+    
+    if elapsed >= app.config['SLOW_REQUEST_SECONDS'] or statements >= app.config['SQL_STATEMENT_WARNING']:
+        SLOW_REQUESTS.inc(route=route)
+        app.logger.warning('Slow request: %s %s took %.0f ms with %d SQL statements (%.0f ms)',
+                           request.method, request.full_path.rstrip('?'), elapsed * 1000,
+                           statements, sql_seconds * 1000)
+    return response
+
+@registry.collector
+def collect_app_metrics():
+    with _auth_lock:
+        auth = dict(_auth_stats)
+    with _dashboard_lock:
+        dashboard_entries = len(_dashboard_cache['entries'])
+    with _event_lock:
+        subscribers = len(_event_subscribers)
+    return [
+        ('clearance_password_hashes_total', 'counter', 'Passwords hashed.', auth['hash_count']),
+        ('clearance_password_hash_seconds_total', 'counter', 'Time spent hashing passwords.', auth['hash_seconds']),
+        ('clearance_password_verifications_total', 'counter', 'Password checks.', auth['verify_count']),
+        ('clearance_password_verify_seconds_total', 'counter', 'Time spent checking passwords.', auth['verify_seconds']),
+        ('clearance_password_rehashes_total', 'counter', 'Hashes upgraded on login.', auth['rehash_count']),
+        ('clearance_login_throttled_total', 'counter', 'Login attempts refused by the rate limiter.', auth['throttled_count']),
+        ('clearance_db_pool_idle_connections', 'gauge', 'Connections waiting in the pool.', _db_pool.qsize()),
+        ('clearance_dashboard_cache_entries', 'gauge', 'Cached student dashboard responses.', dashboard_entries),
+        ('clearance_event_subscribers', 'gauge', 'Open live update streams.', subscribers),
+    ]
+
 # Routes
 @app.route('/')
 def index():
@@ -99,13 +1332,27 @@ def login():
         username = request.form['username']
         password = request.form['password']
         
-        conn = sqlite3.connect('clearance_system.db')
+        retry_after = check_login_rate(username)
+        if retry_after:
+            flash(f'Too many login attempts. Try again in {int(retry_after) + 1} seconds.', 'error')
+            response = make_response(render_template('login.html'), 429)
+            response.headers['Retry-After'] = str(int(retry_after) + 1)
+            return response
+        
+        conn = get_db()
         cursor = conn.cursor()
         cursor.execute('SELECT id, password, name, user_type FROM users WHERE username = ?', (username,))
         user = cursor.fetchone()
-        conn.close()
+        matches, needs_rehash = verify_password(user[1], password) if user else (False, False)
         
-        if user and check_password_hash(user[1], password):
+        if matches:
+            login_succeeded(username)
+            if needs_rehash:
+                cursor.execute('UPDATE users SET password = ? WHERE id = ?', (hash_password(password), user[0]))
+                conn.commit()
+                with _auth_lock:
+                    _auth_stats['rehash_count'] += 1
+            
             session['user_id'] = user[0]
             session['username'] = username
             session['name'] = user[2]
@@ -130,7 +1377,7 @@ def register():
         major = request.form.get('major', '')
         section = request.form['section']
         
-        conn = sqlite3.connect('clearance_system.db')
+        conn = get_db()
         cursor = conn.cursor()
         
         # Check if student number already exists
@@ -139,13 +1386,11 @@ def register():
             flash('Student number already registered', 'error')
         else:
             cursor.execute('INSERT INTO users (username, password, name, user_type, course, year, major, section) VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
-                          (student_number, generate_password_hash(student_number), name, 'student', course, year, major, section))
+                          (student_number, hash_password(student_number), name, 'student', course, year, major, section))
             conn.commit()
             flash('Registration successful! You can now login with your student number as password.', 'success')
-            conn.close()
             return redirect(url_for('login'))
         
-        conn.close()
     
     return render_template('register.html')
 
@@ -167,14 +1412,35 @@ def logout():
     return redirect(url_for('login'))
 
 # API Routes
+@app.route('/metrics')
+def metrics_api():
+    # Scrapers authenticate with a bearer token; admins can use their session
+    token = app.config['METRICS_TOKEN']
+    authorized = bool(token) and request.headers.get('Authorization', '') == f'Bearer {token}'
+    if not authorized and ('user_id' not in session or session.get('user_type') != 'admin'):
+        return jsonify({'success': False, 'message': 'Admin access required'}), 403
+    
+    return Response(registry.render(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/api/auth-metrics')
+def auth_metrics_api():
+    if 'user_id' not in session or session.get('user_type') != 'admin':
+        return jsonify({'success': False, 'message': 'Admin access required'}), 403
+    
+    with _auth_lock:
+        stats = dict(_auth_stats)
+        tracked = len(_login_buckets)
+    for kind in ('hash', 'verify'):
+        count = stats[kind + '_count']
+        stats[kind + '_avg_ms'] = round(stats[kind + '_seconds'] * 1000 / count, 1) if count else None
+    return jsonify({'success': True, 'method': app.config['PASSWORD_HASH_METHOD'],
+                    'tracked_clients': tracked, **stats})
+
 @app.route('/api/requirements', methods=['GET', 'POST'])
 def requirements_api():
     if 'user_id' not in session:
         return jsonify({'success': False, 'message': 'Not authenticated'}), 401
     
-    conn = sqlite3.connect('clearance_system.db')
-    cursor = conn.cursor()
-    
     if request.method == 'POST':
         if session.get('user_type') != 'admin':
             return jsonify({'success': False, 'message': 'Admin access required'}), 403
@@ -185,84 +1451,118 @@ def requirements_api():
         if not req_name:
             return jsonify({'success': False, 'message': 'Requirement name is required'})
         
+        conn = get_db()
+        cursor = conn.cursor()
+        
         try:
             cursor.execute('INSERT INTO requirements (name) VALUES (?)', (req_name,))
             conn.commit()
+            notify_requirements_changed()
             return jsonify({'success': True, 'message': 'Requirement added successfully'})
         except sqlite3.IntegrityError:
             return jsonify({'success': False, 'message': 'Requirement already exists'})
-        finally:
-            conn.close()
     
     else:  # GET
-        cursor.execute('SELECT id, name FROM requirements ORDER BY name')
-        requirements = [{'id': row[0], 'name': row[1]} for row in cursor.fetchall()]
-        conn.close()
-        return jsonify(requirements)
+        requirements, etag = get_requirements()
+        if etag in request.if_none_match:
+            response = Response(status=304)
+        else:
+            response = jsonify(requirements)
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'private, no-cache'
+        return response
 
 @app.route('/api/students')
 def students_api():
     if 'user_id' not in session or session.get('user_type') != 'admin':
         return jsonify({'success': False, 'message': 'Admin access required'}), 403
     
-    conn = sqlite3.connect('clearance_system.db')
+    conn = get_db()
     cursor = conn.cursor()
     
-    # Get filter parameters
-    student_number = request.args.get('student_number', '').strip()
-    course = request.args.get('course', '').strip()
-    year = request.args.get('year', '').strip()
-    major = request.args.get('major', '').strip()
-    section = request.args.get('section', '').strip()
-    
     # Build query with filters - exclude students who have submitted clearances
-    query = '''
+    try:
+        where, params = build_student_filter(request.args)
+    except ValueError:
+        return jsonify({'success': False, 'message': 'Invalid filter'}), 400
+    
+    try:
+        limit, page_cursor = get_page_args()
+        since = request.args.get('since', '').strip()
+        since = int(since) if since else None
+    except ValueError:
+        return jsonify({'success': False, 'message': 'Invalid pagination parameters'}), 400
+    
+    # Read the revision before the data so nothing committed in between is missed
+    revision = current_revision(cursor)
+    
+    if since is not None:
+        # Delta mode: only students changed after ``since``
+        cursor.execute('SELECT MIN(rev) FROM change_log')
+        oldest = cursor.fetchone()[0]
+        cursor.execute("SELECT 1 FROM change_log WHERE rev > ? AND entity = 'requirements' LIMIT 1", (since,))
+        if since > revision or (oldest is not None and since < oldest - 1) or cursor.fetchone():
+            # The log no longer covers ``since`` or the catalog changed
+            return jsonify({'reset': True, 'revision': revision})
+        
+        cursor.execute('''
+            SELECT DISTINCT student_id FROM change_log
+            WHERE rev > ? AND student_id IS NOT NULL
+        ''', (since,))
+        changed_ids = {row[0] for row in cursor.fetchall()}
+        where += ' AND u.id IN (SELECT student_id FROM change_log WHERE rev > ?)'
+        params = params + [since]
+        limit = None
+    
+    select = '''
         SELECT u.id, u.username, u.name, u.course, u.year, u.major, u.section,
-               0 as clearance_submitted
+               0 as clearance_submitted, u.completed_count
         FROM users u
-        WHERE u.user_type = 'student'
-        AND u.id NOT IN (SELECT student_id FROM submitted_clearances)
     '''
-    params = []
-    
-    if student_number:
-        query += ' AND u.username LIKE ?'
-        params.append(f'%{student_number}%')
-    if course:
-        query += ' AND u.course = ?'
-        params.append(course)
-    if year:
-        query += ' AND u.year = ?'
-        params.append(int(year))
-    if major:
-        query += ' AND u.major = ?'
-        params.append(major)
-    if section:
-        query += ' AND u.section = ?'
-        params.append(section)
+    if limit is None:
+        cursor.execute(select + where + ' ORDER BY u.name, u.id', params)
+        students_data = cursor.fetchall()
+    else:
+        cursor.execute('SELECT COUNT(*) FROM users u' + where, params)
+        total = cursor.fetchone()[0]
+        
+        # Keyset pagination on (name, id) so later pages cost the same as the first
+        page_where, page_params = where, list(params)
+        if page_cursor:
+            page_where += ' AND (u.name > ? OR (u.name = ? AND u.id > ?))'
+            page_params += [page_cursor[0], page_cursor[0], page_cursor[1]]
+        cursor.execute(select + page_where + ' ORDER BY u.name, u.id LIMIT ?', page_params + [limit + 1])
+        students_data = cursor.fetchall()
+        next_cursor = None
+        if len(students_data) > limit:
+            students_data = students_data[:limit]
+            next_cursor = encode_cursor(students_data[-1][2], students_data[-1][0])
     
-    query += ' ORDER BY u.name'
+    # Get all requirements
+    requirements, _ = get_requirements()
     
-    cursor.execute(query, params)
-    students_data = cursor.fetchall()
+    # Get student requirements for every matching student in one query
+    # instead of one query per student
+    if limit is None:
+        cursor.execute('''
+            SELECT sr.student_id, sr.requirement_id, sr.completed
+            FROM student_requirements sr
+            WHERE sr.student_id IN (SELECT u.id FROM users u ''' + where + ')', params)
+    else:
+        student_ids = [row[0] for row in students_data]
+        cursor.execute('''
+            SELECT student_id, requirement_id, completed
+            FROM student_requirements
+            WHERE student_id IN (%s)
+        ''' % ','.join('?' * len(student_ids)), student_ids)
     
-    # Get all requirements
-    cursor.execute('SELECT id, name FROM requirements ORDER BY name')
-    requirements = [{'id': row[0], 'name': row[1]} for row in cursor.fetchall()]
+    requirements_by_student = {}
+    for row in cursor.fetchall():
+        requirements_by_student.setdefault(row[0], []).append(
+            {'requirement_id': row[1], 'completed': bool(row[2])})
     
-    # Get student requirements
     students = []
     for student_row in students_data:
-        student_id = student_row[0]
-        cursor.execute('''
-            SELECT requirement_id, completed 
-            FROM student_requirements 
-            WHERE student_id = ?
-        ''', (student_id,))
-        
-        student_reqs = cursor.fetchall()
-        student_requirements = [{'requirement_id': row[0], 'completed': bool(row[1])} for row in student_reqs]
-        
         students.append({
             'id': student_row[0],
             'username': student_row[1],
@@ -272,11 +1572,35 @@ def students_api():
             'major': student_row[5] or '',
             'section': student_row[6],
             'clearance_submitted': bool(student_row[7]),
-            'requirements': student_requirements
+            'completed_count': student_row[8],
+            'requirements': requirements_by_student.get(student_row[0], [])
         })
     
-    conn.close()
-    return jsonify({'students': students, 'requirements': requirements})
+    if since is not None:
+        # Changed students that no longer match (e.g. submitted) should be dropped
+        matched_ids = {student['id'] for student in students}
+        return jsonify({
+            'reset': False,
+            'students': students,
+            'removed': sorted(changed_ids - matched_ids),
+            'requirements': requirements,
+            'revision': revision
+        })
+    if limit is None:
+        return jsonify({'students': students, 'requirements': requirements, 'revision': revision})
+    return jsonify({
+        'students': students,
+        'requirements': requirements,
+        'total': total,
+        'next_cursor': next_cursor,
+        'revision': revision
+    })
+
+UPSERT_STUDENT_REQUIREMENT = '''
+    INSERT INTO student_requirements (student_id, requirement_id, completed)
+    VALUES (?, ?, ?)
+    ON CONFLICT (student_id, requirement_id) DO UPDATE SET completed = excluded.completed
+'''
 
 @app.route('/api/student-requirement', methods=['POST'])
 def student_requirement_api():
@@ -288,33 +1612,98 @@ def student_requirement_api():
     requirement_id = data.get('requirement_id')
     completed = data.get('completed', False)
     
-    conn = sqlite3.connect('clearance_system.db')
+    conn = get_db()
     cursor = conn.cursor()
     
-    # Check if record exists
-    cursor.execute('''
-        SELECT id FROM student_requirements 
-        WHERE student_id = ? AND requirement_id = ?
-    ''', (student_id, requirement_id))
+    cursor.execute(UPSERT_STUDENT_REQUIREMENT, (student_id, requirement_id, completed))
+    conn.commit()
+    notify_students_changed([student_id])
     
-    existing = cursor.fetchone()
+    return jsonify({'success': True})
+
+@app.route('/api/student-requirement/bulk', methods=['POST'])
+def bulk_student_requirement_api():
+    if 'user_id' not in session or session.get('user_type') != 'admin':
+        return jsonify({'success': False, 'message': 'Admin access required'}), 403
+    
+    data = request.get_json(silent=True) or {}
+    if not isinstance(data, dict):
+        return jsonify({'success': False, 'message': 'Request body must be a JSON object'}), 400
+    
+    conn = get_db()
+    cursor = conn.cursor()
+    
+    requirement_ids = {req['id'] for req in get_requirements()[0]}
+    
+    # Either an explicit list of (student, requirement) pairs...
+    if 'items' in data:
+        items = []
+        for item in data.get('items') or []:
+            try:
+                completed = item.get('completed', False)
+                if not isinstance(completed, bool):
+                    raise TypeError('completed must be true or false')
+                items.append((int(item['student_id']), int(item['requirement_id']), completed))
+            except (AttributeError, KeyError, TypeError, ValueError):
+                return jsonify({'success': False, 'message': 'Each item needs a student_id, a requirement_id and a boolean completed'}), 400
+        
+        # Look up which of the referenced students can still be updated
+        student_ids = list({item[0] for item in items})
+        pending_ids = set()
+        for chunk in chunked(student_ids):
+            cursor.execute('''
+                SELECT u.id FROM users u
+                WHERE u.user_type = 'student'
+                AND u.id NOT IN (SELECT student_id FROM submitted_clearances)
+                AND u.id IN (%s)
+            ''' % ','.join('?' * len(chunk)), chunk)
+            pending_ids.update(row[0] for row in cursor.fetchall())
+    
+    # ...or one requirement applied to every pending student matching a filter
+    elif 'filter' in data:
+        try:
+            requirement_id = int(data.get('requirement_id'))
+            where, params = build_student_filter(data.get('filter') or {})
+        except (TypeError, ValueError):
+            return jsonify({'success': False, 'message': 'A valid requirement_id and filter are required'}), 400
+        completed = data.get('completed', False)
+        if not isinstance(completed, bool):
+            return jsonify({'success': False, 'message': 'completed must be true or false'}), 400
+        
+        cursor.execute('SELECT u.id FROM users u' + where + ' ORDER BY u.name, u.id', params)
+        pending_ids = [row[0] for row in cursor.fetchall()]
+        items = [(student_id, requirement_id, completed) for student_id in pending_ids]
+        pending_ids = set(pending_ids)
     
-    if existing:
-        cursor.execute('''
-            UPDATE student_requirements 
-            SET completed = ? 
-            WHERE student_id = ? AND requirement_id = ?
-        ''', (completed, student_id, requirement_id))
     else:
-        cursor.execute('''
-            INSERT INTO student_requirements (student_id, requirement_id, completed) 
-            VALUES (?, ?, ?)
-        ''', (student_id, requirement_id, completed))
+        return jsonify({'success': False, 'message': 'Provide either items or a filter'}), 400
+    
+    results = []
+    valid = []
+    for student_id, requirement_id, completed in items:
+        result = {'student_id': student_id, 'requirement_id': requirement_id, 'completed': completed, 'success': True}
+        if student_id not in pending_ids:
+            result.update(success=False, message='Student not found or clearance already submitted')
+        elif requirement_id not in requirement_ids:
+            result.update(success=False, message='Requirement not found')
+        else:
+            valid.append((student_id, requirement_id, completed))
+        results.append(result)
     
-    conn.commit()
-    conn.close()
+    try:
+        cursor.executemany(UPSERT_STUDENT_REQUIREMENT, valid)
+        conn.commit()
+    except sqlite3.Error as e:
+        conn.rollback()
+        return jsonify({'success': False, 'message': str(e)})
+    notify_students_changed({item[0] for item in valid})
     
-    return jsonify({'success': True})
+    return jsonify({
+        'success': True,
+        'updated': len(valid),
+        'failed': len(results) - len(valid),
+        'results': results
+    })
 
 @app.route('/api/submit-clearance', methods=['POST'])
 def submit_clearance_api():
@@ -324,58 +1713,117 @@ def submit_clearance_api():
     data = request.get_json()
     student_id = data.get('student_id')
     
-    conn = sqlite3.connect('clearance_system.db')
+    conn = get_db()
     cursor = conn.cursor()
     
-    # Check if student has completed all requirements
-    cursor.execute('SELECT COUNT(*) FROM requirements')
-    total_reqs = cursor.fetchone()[0]
-    
-    cursor.execute('''
-        SELECT COUNT(*) FROM student_requirements 
-        WHERE student_id = ? AND completed = 1
-    ''', (student_id,))
-    completed_reqs = cursor.fetchone()[0]
-    
-    if completed_reqs < total_reqs:
-        conn.close()
-        return jsonify({'success': False, 'message': 'Student has not completed all requirements'})
+    # Get student info and check if student has completed all requirements
+    total_reqs = len(get_requirements()[0])
     
-    # Get student info and completed requirements
-    cursor.execute('SELECT username, name FROM users WHERE id = ?', (student_id,))
+    cursor.execute('SELECT username, name, completed_count FROM users WHERE id = ?', (student_id,))
     student_info = cursor.fetchone()
+    if not student_info:
+        return jsonify({'success': False, 'message': 'Student not found'})
     
-    cursor.execute('''
-        SELECT r.name 
-        FROM requirements r
-        JOIN student_requirements sr ON r.id = sr.requirement_id
-        WHERE sr.student_id = ? AND sr.completed = 1
-        ORDER BY r.name
-    ''', (student_id,))
-    
-    completed_reqs = [row[0] for row in cursor.fetchall()]
+    if student_info[2] < total_reqs:
+        return jsonify({'success': False, 'message': 'Student has not completed all requirements'})
     
-    # Get signature template
-    cursor.execute('SELECT signature_template FROM clearances WHERE student_id = ?', (student_id,))
-    sig_template = cursor.fetchone()
-    signature_template = sig_template[0] if sig_template else None
+    # The certificate is signed with the signature current at submission
+    signature_template = get_setting(cursor, 'signature_template')
     
     # Move to submitted clearances table
     submitted_date = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
     cursor.execute('''
-        INSERT INTO submitted_clearances 
-        (student_id, student_name, student_number, completed_requirements, signature_template, submitted_date)
-        VALUES (?, ?, ?, ?, ?, ?)
-    ''', (student_id, student_info[1], student_info[0], json.dumps(completed_reqs), signature_template, submitted_date))
+        INSERT INTO submitted_clearances
+        (student_id, student_name, student_number, signature_template, submitted_date)
+        VALUES (?, ?, ?, ?, ?)
+    ''', (student_id, student_info[1], student_info[0], signature_template, submitted_date))
+    cursor.execute('''
+        INSERT OR IGNORE INTO submitted_clearance_requirements (clearance_id, name, requirement_id)
+        SELECT ?, r.name, r.id
+        FROM student_requirements sr
+        JOIN requirements r ON r.id = sr.requirement_id
+        WHERE sr.student_id = ? AND sr.completed = 1
+    ''', (cursor.lastrowid, student_id))
     
     # Remove from active clearances
     cursor.execute('DELETE FROM clearances WHERE student_id = ?', (student_id,))
     cursor.execute('DELETE FROM student_requirements WHERE student_id = ?', (student_id,))
     
     conn.commit()
-    conn.close()
+    notify_students_changed([student_id])
+    
+    return jsonify({'success': True})
+
+@app.route('/api/submit-clearance/bulk', methods=['POST'])
+def bulk_submit_clearance_api():
+    if 'user_id' not in session or session.get('user_type') != 'admin':
+        return jsonify({'success': False, 'message': 'Admin access required'}), 403
+    
+    data = request.get_json(silent=True) or {}
+    if not isinstance(data, dict):
+        return jsonify({'success': False, 'message': 'Request body must be a JSON object'}), 400
+    try:
+        where, params = build_student_filter(data.get('filter') or {})
+    except ValueError:
+        return jsonify({'success': False, 'message': 'Invalid filter'}), 400
+    
+    started = time.perf_counter()
+    conn = get_db()
+    cursor = conn.cursor()
+    
+    total_reqs = len(get_requirements()[0])
+    if total_reqs == 0:
+        return jsonify({'success': False, 'message': 'No requirements have been posted'})
+    
+    submitted_date = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    
+    try:
+        # Collect every matching student who has completed all requirements
+        cursor.execute('CREATE TEMP TABLE IF NOT EXISTS bulk_submit_students (student_id INTEGER PRIMARY KEY)')
+        cursor.execute('DELETE FROM temp.bulk_submit_students')
+        cursor.execute('''
+            INSERT INTO temp.bulk_submit_students (student_id)
+            SELECT u.id FROM users u
+        ''' + where + ' AND u.completed_count >= ?', params + [total_reqs])
+        
+        # Archive them all with one statement per table, then drop their
+        # active rows. Ids above the current sequence value are the new rows.
+        cursor.execute("SELECT COALESCE(MAX(seq), 0) FROM sqlite_sequence WHERE name = 'submitted_clearances'")
+        last_id = cursor.fetchone()[0]
+        cursor.execute('''
+            INSERT INTO submitted_clearances
+            (student_id, student_name, student_number, signature_template, submitted_date)
+            SELECT u.id, u.name, u.username, ?, ?
+            FROM temp.bulk_submit_students b
+            JOIN users u ON u.id = b.student_id
+        ''', (get_setting(cursor, 'signature_template'), submitted_date))
+        moved = cursor.rowcount
+        cursor.execute('''
+            INSERT OR IGNORE INTO submitted_clearance_requirements (clearance_id, name, requirement_id)
+            SELECT sc.id, r.name, r.id
+            FROM submitted_clearances sc
+            JOIN student_requirements sr ON sr.student_id = sc.student_id AND sr.completed = 1
+            JOIN requirements r ON r.id = sr.requirement_id
+            WHERE sc.id > ?
+        ''', (last_id,))
+        
+        cursor.execute('SELECT student_id FROM temp.bulk_submit_students')
+        submitted_ids = [row[0] for row in cursor.fetchall()]
+        cursor.execute('DELETE FROM clearances WHERE student_id IN (SELECT student_id FROM temp.bulk_submit_students)')
+        cursor.execute('DELETE FROM student_requirements WHERE student_id IN (SELECT student_id FROM temp.bulk_submit_students)')
+        cursor.execute('DELETE FROM temp.bulk_submit_students')
+        
+        conn.commit()
+    except sqlite3.Error as e:
+        conn.rollback()
+        return jsonify({'success': False, 'message': str(e)})
+    notify_students_changed(submitted_ids)
     
-    return jsonify({'success': True})
+    return jsonify({
+        'success': True,
+        'moved': moved,
+        'elapsed_ms': round((time.perf_counter() - started) * 1000, 1)
+    })
 
 @app.route('/api/student-requirements')
 def student_requirements_api():
@@ -383,38 +1831,77 @@ def student_requirements_api():
         return jsonify({'success': False, 'message': 'Student access required'}), 403
     
     student_id = session['user_id']
+    cursor = get_db().cursor()
+    # Read the revision before the data so nothing committed in between is missed
+    revision = current_revision(cursor)
+    catalog, requirements_etag = get_requirements()
+    
+    cached = get_cached_dashboard(cursor, student_id, requirements_etag, revision)
+    if cached is None:
+        token = dashboard_cache_token(student_id)
+        
+        # Get all requirements with student's completion status
+        cursor.execute('''
+            SELECT requirement_id, completed FROM student_requirements WHERE student_id = ?
+        ''', (student_id,))
+        completed_by_requirement = dict(cursor.fetchall())
+        
+        requirements = []
+        for req in catalog:
+            requirements.append({
+                'id': req['id'],
+                'name': req['name'],
+                'completed': bool(completed_by_requirement.get(req['id']))
+            })
+        
+        # Check clearance status - check if student has submitted clearance
+        cursor.execute('SELECT id FROM submitted_clearances WHERE student_id = ?', (student_id,))
+        submitted_clearance = cursor.fetchone()
+        clearance_submitted = bool(submitted_clearance)
+        
+        body = json.dumps({
+            'requirements': requirements,
+            'clearance_submitted': clearance_submitted
+        }).encode('utf-8')
+        cached = hashlib.sha1(body).hexdigest(), body
+        store_cached_dashboard(student_id, token, requirements_etag, revision, *cached)
+    
+    etag, body = cached
+    if etag in request.if_none_match:
+        response = Response(status=304)
+    else:
+        response = Response(body, mimetype='application/json')
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+@app.route('/api/events')
+def events_api():
+    if 'user_id' not in session:
+        return jsonify({'success': False, 'message': 'Not authenticated'}), 401
     
-    conn = sqlite3.connect('clearance_system.db')
-    cursor = conn.cursor()
-    
-    # Get all requirements with student's completion status
-    cursor.execute('''
-        SELECT r.id, r.name,
-               CASE WHEN sr.completed IS NULL THEN 0 ELSE sr.completed END as completed
-        FROM requirements r
-        LEFT JOIN student_requirements sr ON r.id = sr.requirement_id AND sr.student_id = ?
-        ORDER BY r.name
-    ''', (student_id,))
-    
-    requirements = []
-    for row in cursor.fetchall():
-        requirements.append({
-            'id': row[0],
-            'name': row[1],
-            'completed': bool(row[2])
-        })
-    
-    # Check clearance status - check if student has submitted clearance
-    cursor.execute('SELECT id FROM submitted_clearances WHERE student_id = ?', (student_id,))
-    submitted_clearance = cursor.fetchone()
-    clearance_submitted = bool(submitted_clearance)
+    # Admins follow every student; a student only follows themselves
+    student_id = None if session.get('user_type') == 'admin' else session['user_id']
+    subscriber = subscribe_events(student_id)
+    keepalive = app.config['EVENT_KEEPALIVE_SECONDS']
     
-    conn.close()
+    def stream():
+        try:
+            yield 'retry: 5000\n\n'
+            while True:
+                try:
+                    event = subscriber.get(timeout=keepalive)
+                except queue.Empty:
+                    yield ': keepalive\n\n'
+                    continue
+                yield f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+        finally:
+            unsubscribe_events(subscriber)
     
-    return jsonify({
-        'requirements': requirements,
-        'clearance_submitted': clearance_submitted
-    })
+    response = Response(stream(), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
 
 @app.route('/api/student-clearance')
 def student_clearance_api():
@@ -423,7 +1910,7 @@ def student_clearance_api():
     
     student_id = session['user_id']
     
-    conn = sqlite3.connect('clearance_system.db')
+    conn = get_db()
     cursor = conn.cursor()
     
     # Check if clearance is submitted
@@ -443,9 +1930,7 @@ def student_clearance_api():
     ''', (student_id,))
     
     completed_requirements = [{'name': row[0]} for row in cursor.fetchall()]
-    signature_template = clearance_row[1]
-    
-    conn.close()
+    signature_template = clearance_row[1] or get_setting(cursor, 'signature_template')
     
     return jsonify({
         'clearance_submitted': True,
@@ -466,22 +1951,27 @@ def signature_template_api():
         return jsonify({'success': False, 'message': 'No file selected'})
     
     if file and allowed_file(file.filename):
-        import uuid
-        filename = str(uuid.uuid4()) + '.' + file.filename.rsplit('.', 1)[1].lower()
+        # Store the signature downscaled and recompressed the way
+        # certificates embed it, rather than the full-size upload
+        try:
+            signature = certificate.prepare_signature(file.stream)
+        except ValueError:
+            return jsonify({'success': False, 'message': 'Could not read the image'})
+        
+        filename = str(uuid.uuid4()) + '.jpg'
         file_path = os.path.join('static', 'uploads', filename)
         
         # Create uploads directory if it doesn't exist
         os.makedirs(os.path.dirname(file_path), exist_ok=True)
         
-        file.save(file_path)
+        with open(file_path, 'wb') as f:
+            f.write(signature)
         
-        # Store the file path in the database (you could store this globally or per semester)
-        # For now, we'll update all clearance records to use this signature template
-        conn = sqlite3.connect('clearance_system.db')
+        # New submissions are signed with it; earlier ones keep theirs
+        conn = get_db()
         cursor = conn.cursor()
-        cursor.execute('UPDATE clearances SET signature_template = ?', (f'/static/uploads/{filename}',))
+        set_setting(cursor, 'signature_template', f'/static/uploads/{filename}')
         conn.commit()
-        conn.close()
         
         return jsonify({'success': True, 'file_path': f'/static/uploads/{filename}'})
     
@@ -492,18 +1982,41 @@ def all_students_api():
     if 'user_id' not in session or session.get('user_type') != 'admin':
         return jsonify({'success': False, 'message': 'Admin access required'}), 403
     
-    conn = sqlite3.connect('clearance_system.db')
+    conn = get_db()
     cursor = conn.cursor()
     
-    cursor.execute('''
-        SELECT username, name, course, year, major, section
+    try:
+        limit, page_cursor = get_page_args()
+    except ValueError:
+        return jsonify({'success': False, 'message': 'Invalid pagination parameters'}), 400
+    
+    query = '''
+        SELECT username, name, course, year, major, section, id
         FROM users 
         WHERE user_type = 'student'
-        ORDER BY name
-    ''')
+    '''
+    params = []
+    if limit is not None:
+        cursor.execute("SELECT COUNT(*) FROM users WHERE user_type = 'student'")
+        total = cursor.fetchone()[0]
+        if page_cursor:
+            query += ' AND (name > ? OR (name = ? AND id > ?))'
+            params += [page_cursor[0], page_cursor[0], page_cursor[1]]
+        query += ' ORDER BY name, id LIMIT ?'
+        params.append(limit + 1)
+    else:
+        query += ' ORDER BY name, id'
+    
+    cursor.execute(query, params)
+    rows = cursor.fetchall()
+    
+    next_cursor = None
+    if limit is not None and len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1][1], rows[-1][6])
     
     students = []
-    for row in cursor.fetchall():
+    for row in rows:
         students.append({
             'username': row[0],
             'name': row[1],
@@ -513,38 +2026,281 @@ def all_students_api():
             'section': row[5]
         })
     
-    conn.close()
-    return jsonify(students)
+    if limit is None:
+        return jsonify(students)
+    return jsonify({'students': students, 'total': total, 'next_cursor': next_cursor})
 
-@app.route('/api/clear-all-requirements', methods=['POST'])
-def clear_all_requirements():
+@app.route('/api/students/facets')
+def student_facets_api():
     if 'user_id' not in session or session.get('user_type') != 'admin':
         return jsonify({'success': False, 'message': 'Admin access required'}), 403
     
-    conn = sqlite3.connect('clearance_system.db')
-    cursor = conn.cursor()
+    facets, etag = get_student_facets()
+    if etag in request.if_none_match:
+        response = Response(status=304)
+    else:
+        response = jsonify(facets)
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+@app.route('/api/reports/progress')
+def progress_report_api():
+    if 'user_id' not in session or session.get('user_type') != 'admin':
+        return jsonify({'success': False, 'message': 'Admin access required'}), 403
+    
+    cursor = get_db().cursor()
+    requirements = get_requirements()[0]
+    total_reqs = len(requirements)
+    
+    # Everything below reads the trigger-maintained summary tables
+    cursor.execute('''
+        SELECT course, year, section, students, cleared, completed
+        FROM group_progress WHERE students > 0
+        ORDER BY course, year, section
+    ''')
+    groups = []
+    totals = {'students': 0, 'cleared': 0, 'completed': 0}
+    for course, year, section, students, cleared, completed in cursor.fetchall():
+        pending = students - cleared
+        totals['students'] += students
+        totals['cleared'] += cleared
+        totals['completed'] += completed
+        groups.append({
+            'course': course,
+            'year': year,
+            'section': section,
+            'students': students,
+            'cleared': cleared,
+            'pending': pending,
+            'cleared_rate': round(cleared / students, 4),
+            'completion_rate': round(completed / (pending * total_reqs), 4) if pending and total_reqs else None
+        })
+    pending = totals['students'] - totals['cleared']
+    
+    cursor.execute('SELECT requirement_id, completed FROM requirement_progress')
+    completed_by_requirement = dict(cursor.fetchall())
+    requirement_rows = []
+    for req in requirements:
+        completed = completed_by_requirement.get(req['id'], 0)
+        requirement_rows.append({
+            'id': req['id'],
+            'name': req['name'],
+            'completed': completed,
+            'rate': round(completed / pending, 4) if pending else None
+        })
+    
+    eligible = 0
+    if total_reqs:
+        cursor.execute('''
+            SELECT COUNT(*) FROM users
+            WHERE user_type = 'student' AND completed_count >= ?
+        ''', (total_reqs,))
+        eligible = cursor.fetchone()[0]
+    
+    return jsonify({
+        'total_requirements': total_reqs,
+        'students': totals['students'],
+        'cleared': totals['cleared'],
+        'pending': pending,
+        'eligible': eligible,
+        'completion_rate': round(totals['completed'] / (pending * total_reqs), 4) if pending and total_reqs else None,
+        'requirements': requirement_rows,
+        'groups': groups
+    })
+
+@app.route('/api/students/search')
+def search_students_api():
+    if 'user_id' not in session or session.get('user_type') != 'admin':
+        return jsonify({'success': False, 'message': 'Admin access required'}), 403
     
+    text = request.args.get('q', '').strip()
+    if not text:
+        return jsonify({'students': []})
     try:
-        # Clear all requirements
-        cursor.execute('DELETE FROM requirements')
-        
-        # Clear all student requirements
-        cursor.execute('DELETE FROM student_requirements')
-        
-        # Move submitted clearances back to pending by deleting from submitted table
-        cursor.execute('DELETE FROM submitted_clearances')
-        
-        # Reset clearances table to not submitted
-        cursor.execute('UPDATE clearances SET submitted = FALSE')
+        limit = min(max(int(request.args.get('limit', 20)), 1), MAX_PAGE_SIZE)
+    except ValueError:
+        return jsonify({'success': False, 'message': 'Invalid limit'}), 400
+    fuzzy = request.args.get('fuzzy', '1').lower() not in ('0', 'false', 'no')
+    
+    cursor = get_db().cursor()
+    return jsonify({'students': search_students(cursor, text, limit, fuzzy)})
+
+# Bulk student import
+STUDENT_NUMBER_PATTERN = re.compile(r'^022\d-\d{4}$')
+IMPORT_COLUMNS = ('student_number', 'name', 'course', 'year', 'major', 'section')
+MAX_IMPORT_ISSUES = 200
+
+def hash_student_password(student_number):
+    # Students log in with their student number as the initial password.
+    # This runs in the process pool, which imports the same configuration.
+    return generate_password_hash(student_number, method=app.config['PASSWORD_HASH_METHOD'])
+
+def validate_import_row(row):
+    """Return (values, None) for a valid roster row or (None, message)."""
+    student_number = (row.get('student_number') or '').strip()
+    name = (row.get('name') or '').strip()
+    course = (row.get('course') or '').strip()
+    year = (row.get('year') or '').strip()
+    major = (row.get('major') or '').strip()
+    section = (row.get('section') or '').strip()
+    
+    if not STUDENT_NUMBER_PATTERN.match(student_number):
+        return None, 'Student number must use the format 022*-****'
+    if not name:
+        return None, 'Name is required'
+    if not course:
+        return None, 'Course is required'
+    if not year.isdigit() or not 1 <= int(year) <= 4:
+        return None, 'Year must be between 1 and 4'
+    if not section:
+        return None, 'Section is required'
+    return (student_number, name, course, int(year), major, section), None
+
+@app.route('/api/students/import', methods=['POST'])
+def import_students_api():
+    if 'user_id' not in session or session.get('user_type') != 'admin':
+        return jsonify({'success': False, 'message': 'Admin access required'}), 403
+    
+    file = request.files.get('roster')
+    if not file or file.filename == '':
+        return jsonify({'success': False, 'message': 'No file uploaded'})
+    
+    # Read the upload as a stream rather than loading it into memory
+    reader = csv.DictReader(TextIOWrapper(file.stream, encoding='utf-8-sig', newline=''))
+    if not reader.fieldnames:
+        return jsonify({'success': False, 'message': 'The file is empty'})
+    reader.fieldnames = [field.strip().lower().replace(' ', '_') for field in reader.fieldnames]
+    missing = [column for column in IMPORT_COLUMNS if column != 'major' and column not in reader.fieldnames]
+    if missing:
+        return jsonify({'success': False, 'message': 'Missing columns: ' + ', '.join(missing)})
+    
+    started = time.perf_counter()
+    conn = get_db()
+    cursor = conn.cursor()
+    executor = get_process_pool()
+    batch_size = app.config['IMPORT_BATCH_SIZE']
+    
+    stats = {'rows': 0, 'imported': 0, 'duplicate_count': 0, 'error_count': 0}
+    duplicates = []
+    errors = []
+    seen = set()
+    
+    def report(issues, line, **details):
+        if len(issues) < MAX_IMPORT_ISSUES:
+            issues.append(dict(line=line, **details))
+    
+    def insert_batch(batch):
+        # Skip student numbers that are already registered
+        cursor.execute(
+            'SELECT username FROM users WHERE username IN (%s)' % ','.join('?' * len(batch)),
+            [values[0] for _, values in batch])
+        existing = {row[0] for row in cursor.fetchall()}
+        fresh = []
+        for line, values in batch:
+            if values[0] in existing:
+                stats['duplicate_count'] += 1
+                report(duplicates, line, student_number=values[0])
+            else:
+                fresh.append((line, values))
+        if not fresh:
+            return
         
+        # Hashing dominates the cost, so spread it over the process pool
+        hashing_started = time.perf_counter()
+        hashes = executor.map(hash_student_password, [values[0] for _, values in fresh], chunksize=32)
+        rows = [(values[0], password, values[1], 'student') + values[2:]
+                for (_, values), password in zip(fresh, hashes)]
+        record_hash_time('hash', time.perf_counter() - hashing_started, len(rows))
+        cursor.executemany('''
+            INSERT INTO users (username, password, name, user_type, course, year, major, section)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (username) DO NOTHING
+        ''', rows)
+        inserted = cursor.rowcount
         conn.commit()
+        stats['imported'] += inserted
+        stats['duplicate_count'] += len(rows) - inserted
+    
+    batch = []
+    try:
+        for row in reader:
+            stats['rows'] += 1
+            line = reader.line_num
+            values, message = validate_import_row(row)
+            if message:
+                stats['error_count'] += 1
+                report(errors, line, message=message)
+                continue
+            if values[0] in seen:
+                stats['duplicate_count'] += 1
+                report(duplicates, line, student_number=values[0])
+                continue
+            seen.add(values[0])
+            batch.append((line, values))
+            if len(batch) >= batch_size:
+                insert_batch(batch)
+                batch = []
+        if batch:
+            insert_batch(batch)
+    except (UnicodeDecodeError, csv.Error) as e:
+        conn.rollback()
+        return jsonify({'success': False, 'message': f'Could not read the file: {e}', **stats})
+    finally:
+        if stats['imported']:
+            # New students change the roster for every open admin dashboard
+            publish_events([{'type': 'reset'}])
+    
+    elapsed = time.perf_counter() - started
+    return jsonify({
+        'success': True,
+        **stats,
+        'duplicates': duplicates,
+        'errors': errors,
+        'elapsed_ms': round(elapsed * 1000, 1),
+        'rows_per_second': round(stats['rows'] / elapsed, 1) if elapsed else None
+    })
+
+def clear_all_requirements_data(conn):
+    """Delete every requirement and revert every submission, then update
+    the caches and clients. Used by the route and the background job."""
+    cursor = conn.cursor()
+    
+    # Clear all requirements
+    cursor.execute('DELETE FROM requirements')
+    
+    # Clear all student requirements
+    cursor.execute('DELETE FROM student_requirements')
+    
+    # Move submitted clearances back to pending by deleting from submitted table
+    cursor.execute('DELETE FROM submitted_clearance_requirements')
+    cursor.execute('DELETE FROM submitted_clearances')
+    
+    # Reset clearances table to not submitted
+    cursor.execute('UPDATE clearances SET submitted = FALSE')
+    
+    # Every client has to reload anyway, so the log can start over
+    prune_change_log(cursor)
+    
+    conn.commit()
+    bump_requirements_version()
+    notify_students_changed()
+    invalidate_pdf_cache()
+
+@app.route('/api/clear-all-requirements', methods=['POST'])
+def clear_all_requirements():
+    if 'user_id' not in session or session.get('user_type') != 'admin':
+        return jsonify({'success': False, 'message': 'Admin access required'}), 403
+    
+    conn = get_db()
+    
+    try:
+        clear_all_requirements_data(conn)
         return jsonify({'success': True, 'message': 'All requirements cleared and submissions reverted'})
         
     except Exception as e:
         conn.rollback()
         return jsonify({'success': False, 'message': str(e)})
-    finally:
-        conn.close()
 
 @app.route('/api/undo-submission', methods=['POST'])
 def undo_submission():
@@ -557,37 +2313,36 @@ def undo_submission():
     if not student_id:
         return jsonify({'success': False, 'message': 'Student ID is required'})
     
-    conn = sqlite3.connect('clearance_system.db')
+    conn = get_db()
     cursor = conn.cursor()
     
     try:
         # Get the submitted clearance data to restore requirements
         cursor.execute('''
-            SELECT completed_requirements, signature_template 
-            FROM submitted_clearances 
+            SELECT id, signature_template
+            FROM submitted_clearances
             WHERE student_id = ?
+            ORDER BY id LIMIT 1
         ''', (student_id,))
         
         submitted_data = cursor.fetchone()
         if not submitted_data:
             return jsonify({'success': False, 'message': 'No submitted clearance found for this student'})
         
-        completed_requirements = json.loads(submitted_data[0]) if submitted_data[0] else []
         signature_template = submitted_data[1]
         
-        # Restore student requirements
-        cursor.execute('SELECT id, name FROM requirements')
-        all_requirements = cursor.fetchall()
-        
-        for req_id, req_name in all_requirements:
-            # Check if this requirement was completed
-            completed = req_name in completed_requirements
-            
-            # Insert or update student requirement
-            cursor.execute('''
-                INSERT OR REPLACE INTO student_requirements (student_id, requirement_id, completed)
-                VALUES (?, ?, ?)
-            ''', (student_id, req_id, completed))
+        # Restore every current requirement, completed if it was archived
+        # under the same requirement or the same name
+        cursor.execute('''
+            INSERT INTO student_requirements (student_id, requirement_id, completed)
+            SELECT ?, r.id, EXISTS (
+                SELECT 1 FROM submitted_clearance_requirements scr
+                WHERE scr.clearance_id = ? AND (scr.requirement_id = r.id OR scr.name = r.name)
+            )
+            FROM requirements r
+            WHERE 1
+            ON CONFLICT (student_id, requirement_id) DO UPDATE SET completed = excluded.completed
+        ''', (student_id, submitted_data[0]))
         
         # Restore clearance record
         cursor.execute('''
@@ -596,59 +2351,54 @@ def undo_submission():
         ''', (student_id, signature_template))
         
         # Remove from submitted clearances
+        cursor.execute('SELECT id FROM submitted_clearances WHERE student_id = ?', (student_id,))
+        clearance_ids = [row[0] for row in cursor.fetchall()]
         cursor.execute('DELETE FROM submitted_clearances WHERE student_id = ?', (student_id,))
         
         conn.commit()
+        notify_students_changed([student_id])
+        for clearance_id in clearance_ids:
+            invalidate_pdf_cache(clearance_id)
         return jsonify({'success': True, 'message': 'Submission undone successfully'})
         
     except Exception as e:
         conn.rollback()
         return jsonify({'success': False, 'message': str(e)})
-    finally:
-        conn.close()
 
 @app.route('/download-all-clearances')
 def download_all_clearances():
     if 'user_id' not in session or session.get('user_type') != 'admin':
         return jsonify({'success': False, 'message': 'Admin access required'}), 403
     
-    conn = sqlite3.connect('clearance_system.db')
-    cursor = conn.cursor()
-    
-    cursor.execute('''
-        SELECT student_name, student_number, submitted_date
-        FROM submitted_clearances
-        ORDER BY student_name
-    ''')
-    
-    clearances = cursor.fetchall()
-    conn.close()
-    
-    # Create CSV content
-    csv_content = "Name,Student Number,Course,Year Level,Section,Major,Submitted Date\n"
-    
-    # Get detailed student info for each clearance
-    conn = sqlite3.connect('clearance_system.db')
-    cursor = conn.cursor()
-    
-    for clearance in clearances:
-        student_number = clearance[1]
-        cursor.execute('''
-            SELECT name, username, course, year, section, major
-            FROM users 
-            WHERE username = ? AND user_type = 'student'
-        ''', (student_number,))
+    def generate():
+        buffer = StringIO()
+        writer = csv.writer(buffer, lineterminator='\n')
+        writer.writerow(['Name', 'Student Number', 'Course', 'Year Level', 'Section', 'Major', 'Submitted Date'])
+        yield buffer.getvalue()
         
-        student_info = cursor.fetchone()
-        if student_info:
-            csv_content += f"{student_info[0]},{student_info[1]},{student_info[2]},{student_info[3]},{student_info[4]},{student_info[5] or ''},{clearance[2]}\n"
-    
-    conn.close()
-    
-    # Create response
-    response = make_response(csv_content)
+        # One join instead of a users lookup per clearance, streamed in
+        # batches so memory use does not grow with the number of rows.
+        # CROSS JOIN keeps submitted_clearances as the outer loop so rows
+        # come out of the student_name index already sorted.
+        with db_connection() as conn:
+            cursor = conn.execute('''
+                SELECT u.name, u.username, u.course, u.year, u.section, u.major, sc.submitted_date
+                FROM submitted_clearances sc
+                CROSS JOIN users u ON u.username = sc.student_number AND u.user_type = 'student'
+                ORDER BY sc.student_name
+            ''')
+            while True:
+                rows = cursor.fetchmany(500)
+                if not rows:
+                    break
+                buffer.seek(0)
+                buffer.truncate()
+                for row in rows:
+                    writer.writerow(row[:5] + (row[5] or '', row[6]))
+                yield buffer.getvalue()
+    
+    response = Response(generate(), mimetype='text/csv')
     response.headers["Content-Disposition"] = "attachment; filename=all_completed_clearances.csv"
-    response.headers["Content-Type"] = "text/csv"
     
     return response
 
@@ -662,7 +2412,7 @@ def delete_requirement_api(req_id):
     if 'user_id' not in session or session.get('user_type') != 'admin':
         return jsonify({'success': False, 'message': 'Admin access required'}), 403
     
-    conn = sqlite3.connect('clearance_system.db')
+    conn = get_db()
     cursor = conn.cursor()
     
     # Delete associated student requirements first
@@ -671,23 +2421,58 @@ def delete_requirement_api(req_id):
     cursor.execute('DELETE FROM requirements WHERE id = ?', (req_id,))
     
     conn.commit()
-    conn.close()
+    notify_requirements_changed()
     
     return jsonify({'success': True})
 
+def build_submitted_filter(filters):
+    """Build the WHERE clause shared by the submitted clearance listing and
+    the bulk PDF export, joined to users as ``u`` for course/year/etc."""
+    where = ' WHERE 1 = 1'
+    params = []
+    
+    student_number = str(filters.get('student_number') or '').strip()
+    course = str(filters.get('course') or '').strip()
+    year = str(filters.get('year') or '').strip()
+    major = str(filters.get('major') or '').strip()
+    section = str(filters.get('section') or '').strip()
+    
+    if student_number:
+        where += ' AND sc.student_number LIKE ?'
+        params.append(f'%{student_number}%')
+    if course:
+        where += ' AND u.course = ?'
+        params.append(course)
+    if year:
+        where += ' AND u.year = ?'
+        params.append(int(year))
+    if major:
+        where += ' AND u.major = ?'
+        params.append(major)
+    if section:
+        where += ' AND u.section = ?'
+        params.append(section)
+    
+    return where, params
+
 @app.route('/api/submitted-clearances')
 def submitted_clearances_api():
     if 'user_id' not in session or session.get('user_type') != 'admin':
         return jsonify({'success': False, 'message': 'Admin access required'}), 403
     
-    conn = sqlite3.connect('clearance_system.db')
+    try:
+        where, params = build_submitted_filter(request.args)
+    except ValueError:
+        return jsonify({'success': False, 'message': 'Invalid filter'}), 400
+    
+    conn = get_db()
     cursor = conn.cursor()
     
     cursor.execute('''
-        SELECT id, student_id, student_name, student_number, submitted_date 
-        FROM submitted_clearances 
-        ORDER BY submitted_date DESC
-    ''')
+        SELECT sc.id, sc.student_id, sc.student_name, sc.student_number, sc.submitted_date 
+        FROM submitted_clearances sc
+        LEFT JOIN users u ON u.id = sc.student_id
+    ''' + where + ' ORDER BY sc.submitted_date DESC', params)
     
     clearances = []
     for row in cursor.fetchall():
@@ -699,87 +2484,645 @@ def submitted_clearances_api():
             'submitted_date': row[4]
         })
     
-    conn.close()
     return jsonify(clearances)
 
+def render_clearance_pdf(clearance):
+    """Render a clearance certificate and return the PDF bytes.
+    
+    ``clearance`` is a (student_name, student_number, completed_requirements,
+    signature_template, submitted_date) tuple as built by load_clearances(),
+    where completed_requirements is a list of names. Kept at module level so
+    it can run in the bulk export's process pool. The layout lives in
+    certificate.py.
+    """
+    return certificate.render(clearance)
+
+def timed_render_clearance_pdf(clearance):
+    """Return (pdf, seconds) so render time can be recorded even when the
+    render ran in another process."""
+    started = time.perf_counter()
+    pdf = render_clearance_pdf(clearance)
+    return pdf, time.perf_counter() - started
+
+def load_clearances(cursor, where='', params=()):
+    """Return [(clearance_id, clearance)] for submitted clearances matching
+    ``where`` (joined to users as ``u``), in student name order, where each
+    clearance is the tuple render_clearance_pdf() takes. Clearances
+    submitted before a signature was uploaded get the current one."""
+    cursor.execute('''
+        SELECT sc.id, sc.student_name, sc.student_number,
+               COALESCE(sc.signature_template, (SELECT value FROM settings WHERE key = 'signature_template')),
+               sc.submitted_date
+        FROM submitted_clearances sc
+        LEFT JOIN users u ON u.id = sc.student_id
+    ''' + where + ' ORDER BY sc.student_name', params)
+    rows = cursor.fetchall()
+    
+    requirements = {}
+    for chunk in chunked([row[0] for row in rows]):
+        cursor.execute(f'''
+            SELECT clearance_id, name FROM submitted_clearance_requirements
+            WHERE clearance_id IN ({','.join('?' * len(chunk))})
+            ORDER BY clearance_id, name
+        ''', chunk)
+        for clearance_id, name in cursor.fetchall():
+            requirements.setdefault(clearance_id, []).append(name)
+    
+    return [(row[0], (row[1], row[2], requirements.get(row[0], []), row[3], row[4])) for row in rows]
+
+def clearance_pdf_filename(clearance):
+    return f"clearance_{clearance[1]}_{clearance[4].replace(':', '_').replace(' ', '_')}.pdf"
+
+# PDF cache
+# A submitted clearance never changes until it is undone, so rendered PDFs
+# are kept on disk under a hash of everything that goes into them. The hash
+# doubles as the ETag. Bump PDF_TEMPLATE_VERSION whenever the layout changes.
+PDF_TEMPLATE_VERSION = 2
+_pdf_cache_lock = threading.Lock()
+# Running size of the cache directory, see add_pdf_cache_usage()
+_pdf_cache_usage = {'dir': None, 'bytes': 0, 'scanned_at': 0.0}
+
+def signature_fingerprint(signature_template):
+    if not signature_template:
+        return ''
+    try:
+        stat = os.stat(signature_template.lstrip('/'))
+    except OSError:
+        return 'missing'
+    return f'{stat.st_size}:{stat.st_mtime_ns}'
+
+def pdf_cache_key(clearance_id, clearance):
+    payload = json.dumps([
+        PDF_TEMPLATE_VERSION,
+        clearance_id,
+        list(clearance),
+        signature_fingerprint(clearance[3]),
+    ])
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+def pdf_cache_path(clearance_id, key):
+    return os.path.join(os.path.abspath(app.config['PDF_CACHE_DIR']), f'{clearance_id}-{key}.pdf')
+
+def read_cached_pdf(clearance_id, key):
+    pdf_file = open_cached_pdf(clearance_id, key)
+    if pdf_file is None:
+        return None
+    with pdf_file:
+        return pdf_file.read()
+
+def open_cached_pdf(clearance_id, key):
+    """Open a cached PDF and mark it as recently used, or return None on a
+    miss. An open file stays readable even if eviction deletes it while it
+    is being served."""
+    path = pdf_cache_path(clearance_id, key)
+    try:
+        pdf_file = open(path, 'rb')
+    except OSError:
+        return None
+    # Touch the file so eviction treats it as recently used
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+    return pdf_file
+
+def store_cached_pdf(clearance_id, key, pdf, keep_open=False):
+    """Add a PDF to the cache. Returns its path, or with ``keep_open`` a
+    file open on it for serving."""
+    path = pdf_cache_path(clearance_id, key)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f'{path}.{uuid.uuid4().hex}.tmp'
+    pdf_file = open(tmp_path, 'w+b')
+    try:
+        pdf_file.write(pdf)
+        pdf_file.flush()
+        try:
+            replaced = os.stat(path).st_size
+        except OSError:
+            replaced = 0
+        os.replace(tmp_path, path)
+    except BaseException:
+        pdf_file.close()
+        raise
+    if keep_open:
+        pdf_file.seek(0)
+    else:
+        pdf_file.close()
+    add_pdf_cache_usage(len(pdf) - replaced)
+    return pdf_file if keep_open else path
+
+def scan_pdf_cache(cache_dir):
+    """Return ([(mtime, size, path)], total bytes) for the cached PDFs."""
+    entries = []
+    total = 0
+    try:
+        with os.scandir(cache_dir) as it:
+            for entry in it:
+                if not entry.name.endswith('.pdf'):
+                    continue
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+    except OSError:
+        pass
+    return entries, total
+
+def add_pdf_cache_usage(delta):
+    """Update the running size of the cache and evict if it is over its
+    limit. The directory is only rescanned when the total is unknown, when
+    it goes over the limit, or every PDF_CACHE_RESCAN_SECONDS to pick up
+    files added or removed by other processes."""
+    cache_dir = os.path.abspath(app.config['PDF_CACHE_DIR'])
+    with _pdf_cache_lock:
+        usage = _pdf_cache_usage
+        if usage['dir'] != cache_dir or time.monotonic() - usage['scanned_at'] > app.config['PDF_CACHE_RESCAN_SECONDS']:
+            usage.update(dir=cache_dir, bytes=scan_pdf_cache(cache_dir)[1], scanned_at=time.monotonic())
+        else:
+            usage['bytes'] += delta
+        if usage['bytes'] > app.config['PDF_CACHE_MAX_BYTES']:
+            usage['bytes'] = evict_pdf_cache(cache_dir)
+            usage['scanned_at'] = time.monotonic()
+
+def evict_pdf_cache(cache_dir):
+    """Delete least recently used PDFs until the cache is back under 90%
+    of its size limit, so the next few stores do not evict again. Returns
+    the bytes left. Call with _pdf_cache_lock held."""
+    entries, total = scan_pdf_cache(cache_dir)
+    target = app.config['PDF_CACHE_MAX_BYTES'] * 0.9
+    if total <= target:
+        return total
+    entries.sort()
+    for _, size, path in entries:
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        total -= size
+        if total <= target:
+            break
+    return total
+
+def invalidate_pdf_cache(clearance_id=None):
+    """Drop cached PDFs for one clearance, or the whole cache."""
+    cache_dir = os.path.abspath(app.config['PDF_CACHE_DIR'])
+    prefix = f'{clearance_id}-' if clearance_id is not None else ''
+    with _pdf_cache_lock:
+        try:
+            names = os.listdir(cache_dir)
+        except OSError:
+            return
+        removed = 0
+        for name in names:
+            if name.startswith(prefix) and name.endswith('.pdf'):
+                path = os.path.join(cache_dir, name)
+                try:
+                    size = os.stat(path).st_size
+                    os.remove(path)
+                except OSError:
+                    continue
+                removed += size
+        if _pdf_cache_usage['dir'] == cache_dir:
+            _pdf_cache_usage['bytes'] = max(_pdf_cache_usage['bytes'] - removed, 0)
+
 @app.route('/api/download-clearance/<int:clearance_id>')
 def download_clearance_api(clearance_id):
     if 'user_id' not in session:
         return jsonify({'success': False, 'message': 'Authentication required'}), 401
     
-    conn = sqlite3.connect('clearance_system.db')
+    conn = get_db()
     cursor = conn.cursor()
     
-    cursor.execute('''
-        SELECT student_name, student_number, completed_requirements, signature_template, submitted_date
-        FROM submitted_clearances WHERE id = ?
-    ''', (clearance_id,))
-    
-    clearance = cursor.fetchone()
-    conn.close()
+    clearances = load_clearances(cursor, 'WHERE sc.id = ?', (clearance_id,))
     
-    if not clearance:
+    if not clearances:
         return jsonify({'success': False, 'message': 'Clearance not found'}), 404
+    clearance = clearances[0][1]
+    
+    key = pdf_cache_key(clearance_id, clearance)
+    if key in request.if_none_match:
+        PDF_CACHE_REQUESTS.inc(result='not_modified')
+        response = Response(status=304)
+        response.set_etag(key)
+        return response
+    
+    # Serve from an open file, so a concurrent eviction cannot remove it
+    # between the cache lookup and the response
+    pdf_file = open_cached_pdf(clearance_id, key)
+    if pdf_file is not None:
+        PDF_CACHE_REQUESTS.inc(result='hit')
+    else:
+        PDF_CACHE_REQUESTS.inc(result='miss')
+        pdf, seconds = timed_render_clearance_pdf(clearance)
+        PDF_RENDER_SECONDS.observe(seconds, source='download')
+        pdf_file = store_cached_pdf(clearance_id, key, pdf, keep_open=True)
     
-    # Generate PDF
-    buffer = BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=letter, rightMargin=72, leftMargin=72, topMargin=72, bottomMargin=18)
-    
-    styles = getSampleStyleSheet()
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontSize=18,
-        spaceAfter=30,
-        alignment=TA_CENTER,
+    response = send_file(
+        pdf_file,
+        as_attachment=True,
+        download_name=clearance_pdf_filename(clearance),
+        mimetype='application/pdf',
+        etag=key,
+        max_age=0
     )
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+# Bulk PDF export
+# Rendering is CPU-bound, so certificates are rendered in a process pool and
+# written into a ZIP that is streamed to the client as each one finishes.
+_process_pool = None
+_process_pool_lock = threading.Lock()
+
+def get_process_pool():
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is None:
+            # spawn rather than fork: the server process holds threads and
+            # open SQLite connections that must not be copied into workers
+            _process_pool = ProcessPoolExecutor(
+                max_workers=app.config['PDF_WORKERS'],
+                mp_context=multiprocessing.get_context('spawn'),
+            )
+        return _process_pool
+
+class ZipStream:
+    """Write-only file object that buffers what ZipFile writes so a
+    generator can hand it to the client piece by piece."""
     
-    normal_style = ParagraphStyle(
-        'CustomNormal',
-        parent=styles['Normal'],
-        fontSize=12,
-        spaceAfter=12,
-        alignment=TA_LEFT,
-    )
+    def __init__(self):
+        self.chunks = []
     
-    story = []
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
     
-    # Title
-    story.append(Paragraph("STUDENT CLEARANCE CERTIFICATE", title_style))
-    story.append(Spacer(1, 12))
+    def flush(self):
+        pass
     
-    # Student Info
-    story.append(Paragraph(f"<b>Student Name:</b> {clearance[0]}", normal_style))
-    story.append(Paragraph(f"<b>Student Number:</b> {clearance[1]}", normal_style))
-    story.append(Paragraph(f"<b>Date of Submission:</b> {clearance[4]}", normal_style))
-    story.append(Spacer(1, 20))
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+def iter_rendered_pdfs(rows, executor, window):
+    """Yield (clearance, pdf) for each (clearance_id, clearance) row. Cached
+    PDFs are served directly; the rest are rendered in ``executor`` and
+    added to the cache as they finish."""
+    def finished(future):
+        clearance_id, clearance, key = pending.pop(future)
+        pdf, seconds = future.result()
+        PDF_RENDER_SECONDS.observe(seconds, source='export')
+        store_cached_pdf(clearance_id, key, pdf)
+        return clearance, pdf
+    
+    # Keep at most ``window`` renders in flight so memory stays bounded
+    pending = {}
+    for clearance_id, clearance in rows:
+        key = pdf_cache_key(clearance_id, clearance)
+        pdf = read_cached_pdf(clearance_id, key)
+        if pdf is not None:
+            yield clearance, pdf
+            continue
+        if len(pending) >= window:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield finished(future)
+        pending[executor.submit(timed_render_clearance_pdf, clearance)] = (clearance_id, clearance, key)
+    for future in as_completed(list(pending)):
+        yield finished(future)
+
+def write_certificates_zip(fileobj, rows, executor, window):
+    """Write a ZIP of the certificates for ``rows`` into ``fileobj``,
+    yielding after each one is added."""
+    # PDFs are already compressed, so store them as-is
+    with zipfile.ZipFile(fileobj, 'w', compression=zipfile.ZIP_STORED) as archive:
+        for clearance, pdf in iter_rendered_pdfs(rows, executor, window):
+            archive.writestr(clearance_pdf_filename(clearance), pdf)
+            yield
+
+@app.route('/download-clearances-zip')
+def download_clearances_zip():
+    if 'user_id' not in session or session.get('user_type') != 'admin':
+        return jsonify({'success': False, 'message': 'Admin access required'}), 403
+    
+    try:
+        where, params = build_submitted_filter(request.args)
+    except ValueError:
+        return jsonify({'success': False, 'message': 'Invalid filter'}), 400
     
-    # Requirements
-    story.append(Paragraph("<b>Completed Requirements:</b>", normal_style))
-    story.append(Spacer(1, 12))
+    executor = get_process_pool()
+    window = app.config['PDF_WORKERS'] * 4
     
-    requirements = json.loads(clearance[2])
-    for req in requirements:
-        story.append(Paragraph(f"• {req}", normal_style))
+    def generate():
+        with db_connection() as conn:
+            rows = load_clearances(conn.cursor(), where, params)
+        
+        stream = ZipStream()
+        for _ in write_certificates_zip(stream, rows, executor, window):
+            yield stream.drain()
+        yield stream.drain()
+    
+    response = Response(generate(), mimetype='application/zip')
+    response.headers["Content-Disposition"] = "attachment; filename=clearance_certificates.zip"
+    
+    return response
+
+# Background jobs
+# Slow admin operations run on worker threads instead of inside the
+# request. A job is a row in the jobs table: POST /api/jobs queues one, the
+# client polls /api/jobs/<id> for progress and then fetches the result
+# file, if the job made one, from /api/jobs/<id>/result. Workers claim
+# queued rows with a single UPDATE ... RETURNING, so several server
+# processes can share the table, and they poll it as well as being woken
+# so jobs queued by another process are picked up. Workers start with the
+# first request, and a heartbeat thread keeps this process's running jobs
+# fresh and fails any that another process, or an earlier run of this one,
+# stopped updating.
+JOB_HANDLERS = {}
+JOB_COLUMNS = ('id', 'kind', 'status', 'progress', 'total', 'message', 'result_name',
+               'created_at', 'started_at', 'finished_at')
+JOBS_FINISHED = registry.counter(
+    'clearance_jobs_finished_total', 'Background jobs finished, by kind and status.', ('kind', 'status'))
+JOB_SECONDS = registry.histogram(
+    'clearance_job_duration_seconds', 'Time to run a background job, by kind.', ('kind',),
+    (0.1, 0.5, 1.0, 5.0, 15.0, 60.0, 300.0, 900.0, 3600.0))
+_job_workers = []
+_job_workers_lock = threading.Lock()
+_running_jobs = set()
+_job_wakeup = threading.Event()
+_jobs_pruned_at = 0.0
+
+def job_handler(kind):
+    """Register a function as the handler for jobs of ``kind``. It is
+    called as handler(job_id, params, progress) on a worker thread and
+    returns a dict with an optional 'message' and, if it wrote
+    job_result_path(job_id), the 'result_name' and 'result_type' to
+    serve it with."""
+    def register(func):
+        JOB_HANDLERS[kind] = func
+        return func
+    return register
+
+def job_timestamp(seconds_ago=0):
+    return (datetime.now() - timedelta(seconds=seconds_ago)).strftime('%Y-%m-%d %H:%M:%S')
+
+def job_result_path(job_id):
+    return os.path.join(os.path.abspath(app.config['JOB_RESULTS_DIR']), f'job-{job_id}')
+
+def job_json(row):
+    job = dict(zip(JOB_COLUMNS, row))
+    if job['status'] == 'done' and job['result_name']:
+        job['result_url'] = url_for('job_result_api', job_id=job['id'])
+    return job
+
+def enqueue_job(cursor, kind, params, created_by=None):
+    """Queue a job and return its id. Wake the workers with
+    start_job_workers() once the insert is committed."""
+    cursor.execute('''
+        INSERT INTO jobs (kind, params, created_by, created_at) VALUES (?, ?, ?, ?)
+    ''', (kind, json.dumps(params), created_by, job_timestamp()))
+    return cursor.lastrowid
+
+class JobProgress:
+    """Passed to job handlers to record how far they are. Writes go
+    through the worker's own connection, never the handler's, and are
+    throttled so a job over thousands of items does not commit for each."""
+    
+    def __init__(self, conn, job_id):
+        self.conn = conn
+        self.job_id = job_id
+        self.written_at = 0.0
+    
+    def __call__(self, done, total=None):
+        now = time.monotonic()
+        if now - self.written_at < app.config['JOB_PROGRESS_INTERVAL'] and done != total:
+            return
+        self.written_at = now
+        self.conn.execute('''
+            UPDATE jobs SET progress = ?, total = COALESCE(?, total), updated_at = ? WHERE id = ?
+        ''', (done, total, job_timestamp(), self.job_id))
+        self.conn.commit()
+
+def claim_job(conn):
+    row = conn.execute('''
+        UPDATE jobs SET status = 'running', started_at = ?1, updated_at = ?1
+        WHERE id = (SELECT id FROM jobs WHERE status = 'queued' ORDER BY id LIMIT 1)
+        RETURNING id, kind, params
+    ''', (job_timestamp(),)).fetchone()
+    conn.commit()
+    return row
+
+def run_job(conn, job_id, kind, params):
+    started = time.perf_counter()
+    handler = JOB_HANDLERS.get(kind)
+    with _job_workers_lock:
+        _running_jobs.add(job_id)
+    try:
+        if handler is None:
+            raise ValueError(f'Unknown job kind: {kind}')
+        result = handler(job_id, json.loads(params), JobProgress(conn, job_id)) or {}
+        status = 'done'
+    except Exception as e:
+        app.logger.exception('Job %s (%s) failed', job_id, kind)
+        conn.rollback()
+        result, status = {'message': str(e)}, 'failed'
+    finally:
+        with _job_workers_lock:
+            _running_jobs.discard(job_id)
+    finished_at = job_timestamp()
+    conn.execute('''
+        UPDATE jobs SET status = ?, message = ?, result_name = ?, result_type = ?,
+               finished_at = ?, updated_at = ?
+        WHERE id = ?
+    ''', (status, result.get('message'), result.get('result_name'), result.get('result_type'),
+          finished_at, finished_at, job_id))
+    conn.commit()
+    JOBS_FINISHED.inc(kind=kind, status=status)
+    JOB_SECONDS.observe(time.perf_counter() - started, kind=kind)
+
+def reclaim_stale_jobs(conn):
+    """Fail running jobs nobody has updated for JOB_STALE_SECONDS, so a
+    client polling a job whose process died or was restarted gets an answer."""
+    stale = job_timestamp(app.config['JOB_STALE_SECONDS'])
+    if conn.execute("SELECT 1 FROM jobs WHERE status = 'running' AND updated_at < ? LIMIT 1", (stale,)).fetchone():
+        now = job_timestamp()
+        conn.execute('''
+            UPDATE jobs SET status = 'failed', message = 'Interrupted', finished_at = ?, updated_at = ?
+            WHERE status = 'running' AND updated_at < ?
+        ''', (now, now, stale))
+        conn.commit()
+
+def prune_jobs(conn):
+    """Delete finished jobs past retention, with their result files. Runs
+    at most once a minute per process."""
+    global _jobs_pruned_at
+    now = time.monotonic()
+    if now - _jobs_pruned_at < 60:
+        return
+    _jobs_pruned_at = now
+    
+    expired = job_timestamp(app.config['JOB_RETENTION_SECONDS'])
+    expired_ids = [row[0] for row in conn.execute(
+        "SELECT id FROM jobs WHERE status IN ('done', 'failed') AND finished_at < ?", (expired,))]
+    if expired_ids:
+        for chunk in chunked(expired_ids):
+            conn.execute(f"DELETE FROM jobs WHERE id IN ({','.join('?' * len(chunk))})", chunk)
+        conn.commit()
+        for job_id in expired_ids:
+            try:
+                os.remove(job_result_path(job_id))
+            except OSError:
+                pass
+
+def job_worker():
+    while True:
+        try:
+            with db_connection() as conn:
+                job = claim_job(conn)
+                if job is None:
+                    prune_jobs(conn)
+                else:
+                    # There may be more queued; let an idle worker look
+                    _job_wakeup.set()
+                    run_job(conn, *job)
+        except Exception:
+            app.logger.exception('Job worker error')
+            job = None
+        if job is None and _job_wakeup.wait(app.config['JOB_POLL_SECONDS']):
+            _job_wakeup.clear()
+
+def job_heartbeat():
+    """Touch the jobs this process is running, which handlers that report
+    no progress would otherwise leave looking abandoned, then reclaim stale
+    ones. The first pass runs as workers start, failing whatever a previous
+    run of the server left behind."""
+    while True:
+        try:
+            with db_connection() as conn:
+                with _job_workers_lock:
+                    running = list(_running_jobs)
+                if running:
+                    conn.execute(f"""
+                        UPDATE jobs SET updated_at = ? WHERE status = 'running'
+                        AND id IN ({','.join('?' * len(running))})
+                    """, [job_timestamp()] + running)
+                    conn.commit()
+                reclaim_stale_jobs(conn)
+        except Exception:
+            app.logger.exception('Job heartbeat error')
+        time.sleep(app.config['JOB_HEARTBEAT_SECONDS'])
+
+def start_job_workers():
+    """Start this process's worker threads if needed and wake one up."""
+    with _job_workers_lock:
+        if not _job_workers:
+            threading.Thread(target=job_heartbeat, name='job-heartbeat', daemon=True).start()
+        while len(_job_workers) < app.config['JOB_WORKERS']:
+            worker = threading.Thread(target=job_worker, name=f'job-worker-{len(_job_workers) + 1}', daemon=True)
+            worker.start()
+            _job_workers.append(worker)
+    _job_wakeup.set()
+
+@app.before_request
+def ensure_job_workers():
+    # Under a WSGI server nothing of ours runs before the first request, so
+    # start here; jobs queued before a restart are then picked up without
+    # waiting for someone to queue another
+    if not _job_workers:
+        start_job_workers()
+
+@job_handler('clear_requirements')
+def clear_requirements_job(job_id, params, progress):
+    with db_connection() as conn:
+        clear_all_requirements_data(conn)
+    return {'message': 'All requirements cleared and submissions reverted'}
+
+@job_handler('export_certificates')
+def export_certificates_job(job_id, params, progress):
+    where, where_params = build_submitted_filter(params)
+    with db_connection() as conn:
+        rows = load_clearances(conn.cursor(), where, where_params)
+    progress(0, len(rows))
+    
+    path = job_result_path(job_id)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'wb') as f:
+        executor = get_process_pool()
+        window = app.config['PDF_WORKERS'] * 4
+        for done, _ in enumerate(write_certificates_zip(f, rows, executor, window), start=1):
+            progress(done, len(rows))
+    os.replace(tmp_path, path)
+    return {'message': f'{len(rows)} certificates exported',
+            'result_name': 'clearance_certificates.zip', 'result_type': 'application/zip'}
+
+@app.route('/api/jobs', methods=['GET', 'POST'])
+def jobs_api():
+    if 'user_id' not in session or session.get('user_type') != 'admin':
+        return jsonify({'success': False, 'message': 'Admin access required'}), 403
     
-    story.append(Spacer(1, 30))
+    conn = get_db()
+    cursor = conn.cursor()
     
-    # Signature section
-    if clearance[3]:
-        story.append(Paragraph("<b>Authorized Signatures:</b>", normal_style))
-        story.append(Spacer(1, 12))
-        # You would add the signature image here if needed
-        story.append(Paragraph("[Signature Template Section]", normal_style))
+    if request.method == 'POST':
+        data = request.get_json(silent=True) or {}
+        kind = data.get('kind')
+        params = data.get('params') or {}
+        if kind not in JOB_HANDLERS:
+            return jsonify({'success': False, 'message': 'Unknown job kind'}), 400
+        if not isinstance(params, dict):
+            return jsonify({'success': False, 'message': 'Invalid job parameters'}), 400
+        if kind == 'export_certificates':
+            try:
+                build_submitted_filter(params)
+            except ValueError:
+                return jsonify({'success': False, 'message': 'Invalid filter'}), 400
+        
+        job_id = enqueue_job(cursor, kind, params, session['user_id'])
+        conn.commit()
+        start_job_workers()
+        
+        cursor.execute(f"SELECT {', '.join(JOB_COLUMNS)} FROM jobs WHERE id = ?", (job_id,))
+        response = jsonify({'success': True, 'job': job_json(cursor.fetchone())})
+        response.status_code = 202
+        response.headers['Location'] = url_for('job_api', job_id=job_id)
+        return response
+    
+    cursor.execute(f"SELECT {', '.join(JOB_COLUMNS)} FROM jobs ORDER BY id DESC LIMIT 20")
+    return jsonify({'success': True, 'jobs': [job_json(row) for row in cursor.fetchall()]})
+
+@app.route('/api/jobs/<int:job_id>')
+def job_api(job_id):
+    if 'user_id' not in session or session.get('user_type') != 'admin':
+        return jsonify({'success': False, 'message': 'Admin access required'}), 403
     
-    doc.build(story)
-    buffer.seek(0)
+    cursor = get_db().cursor()
+    cursor.execute(f"SELECT {', '.join(JOB_COLUMNS)} FROM jobs WHERE id = ?", (job_id,))
+    row = cursor.fetchone()
+    if not row:
+        return jsonify({'success': False, 'message': 'Job not found'}), 404
+    return jsonify({'success': True, 'job': job_json(row)})
+
+@app.route('/api/jobs/<int:job_id>/result')
+def job_result_api(job_id):
+    if 'user_id' not in session or session.get('user_type') != 'admin':
+        return jsonify({'success': False, 'message': 'Admin access required'}), 403
     
-    return send_file(
-        buffer,
-        as_attachment=True,
-        download_name=f"clearance_{clearance[1]}_{clearance[4].replace(':', '_').replace(' ', '_')}.pdf",
-        mimetype='application/pdf'
-    )
+    cursor = get_db().cursor()
+    cursor.execute('SELECT status, result_name, result_type FROM jobs WHERE id = ?', (job_id,))
+    row = cursor.fetchone()
+    if not row:
+        return jsonify({'success': False, 'message': 'Job not found'}), 404
+    if row[0] != 'done':
+        return jsonify({'success': False, 'message': 'Job has not finished'}), 409
+    path = job_result_path(job_id)
+    if not row[1] or not os.path.exists(path):
+        return jsonify({'success': False, 'message': 'Job has no result'}), 404
+    
+    return send_file(path, as_attachment=True, download_name=row[1], mimetype=row[2])
 
 if __name__ == '__main__':
     init_db()
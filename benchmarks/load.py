@@ -0,0 +1,430 @@
+"""Load test for the hot endpoints.
+
+Seeds a throwaway database through init_db with synthetic students,
+requirements and submitted clearances, then drives each endpoint at a set
+concurrency and reports p50/p95/p99 latency and throughput. Results are
+saved as JSON under benchmarks/results/ so runs can be compared across
+commits.
+
+    python benchmarks/load.py --students 10000 --concurrency 8
+    python benchmarks/load.py --endpoints students,pdf --compare benchmarks/results/<earlier>.json
+
+By default requests go through Flask's test client in this process. To
+measure a real server, seed a database file, start the app on it, and
+point the benchmark at it:
+
+    python benchmarks/load.py --seed-only --db /tmp/bench.db --students 10000
+    CLEARANCE_DB=/tmp/bench.db python app.py
+    python benchmarks/load.py --url http://127.0.0.1:5000 --db /tmp/bench.db
+"""
+import argparse
+import http.cookiejar
+import json
+import os
+import random
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import app as clearance_app
+from werkzeug.security import generate_password_hash
+
+RESULTS_DIR = os.path.join(ROOT, 'benchmarks', 'results')
+# login runs last so its attempts do not use up the throttle for the others
+ENDPOINTS = ['students', 'student_requirements', 'toggle', 'csv', 'pdf', 'login']
+COURSES = ['BSIT', 'BSCS', 'BSIS', 'BSEMC']
+MAJORS = ['WMAD', 'AMG', 'SMP', 'NETAD', '']
+FIRST_NAMES = ['John', 'Maria', 'Jose', 'Ana', 'Mark', 'Grace', 'Paolo', 'Kristine', 'Rhea', 'Carlo']
+LAST_NAMES = ['Santos', 'Reyes', 'Cruz', 'Bautista', 'Garcia', 'Mendoza', 'Torres', 'Flores', 'Villanueva', 'Ramos']
+ADMIN = ('ronronadmin', 'ronron1234')
+
+
+def seed(db_path, students, requirements, submitted, login_users, rng):
+    """Create the schema with init_db and fill it with synthetic data.
+
+    Every student gets a row per requirement, completed at random. The
+    first ``submitted`` students complete everything and are archived the
+    way submit_clearance_api does it. Only the next ``login_users``
+    students get a real password hash (their student number), since
+    hashing is deliberately slow; the rest get a placeholder.
+    """
+    clearance_app.app.config['DATABASE'] = db_path
+    clearance_app.init_db()
+
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    cursor.executemany('INSERT INTO requirements (name) VALUES (?)',
+                       [(f'Requirement {i + 1:02d}',) for i in range(requirements)])
+
+    method = clearance_app.app.config['PASSWORD_HASH_METHOD']
+    rows = []
+    for i in range(students):
+        number = f'022{i % 10}-{i // 10:04d}' if students <= 100000 else f'022{i % 10}-{i:06d}'
+        password = generate_password_hash(number, method=method) if submitted <= i < submitted + login_users else 'x'
+        name = f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {i}'
+        rows.append((number, password, name, 'student', rng.choice(COURSES), rng.randint(1, 4),
+                     rng.choice(MAJORS), rng.choice('ABCD')))
+    cursor.executemany('''
+        INSERT INTO users (username, password, name, user_type, course, year, major, section)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    ''', rows)
+
+    cursor.execute("SELECT id FROM users WHERE user_type = 'student' ORDER BY id")
+    student_ids = [row[0] for row in cursor.fetchall()]
+    cursor.execute('SELECT id FROM requirements')
+    requirement_ids = [row[0] for row in cursor.fetchall()]
+    submitted_ids = set(student_ids[:submitted])
+    cursor.executemany(
+        'INSERT INTO student_requirements (student_id, requirement_id, completed) VALUES (?, ?, ?)',
+        ((sid, rid, sid in submitted_ids or rng.random() < 0.6) for sid in student_ids for rid in requirement_ids))
+
+    submitted_date = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    cursor.executemany('''
+        INSERT INTO submitted_clearances (student_id, student_name, student_number, signature_template, submitted_date)
+        SELECT id, name, username, NULL, ? FROM users WHERE id = ?
+    ''', ((submitted_date, sid) for sid in sorted(submitted_ids)))
+    cursor.execute('''
+        INSERT INTO submitted_clearance_requirements (clearance_id, name, requirement_id)
+        SELECT sc.id, r.name, r.id
+        FROM submitted_clearances sc
+        JOIN student_requirements sr ON sr.student_id = sc.student_id AND sr.completed = 1
+        JOIN requirements r ON r.id = sr.requirement_id
+    ''')
+    cursor.execute('''
+        DELETE FROM student_requirements
+        WHERE student_id IN (SELECT student_id FROM submitted_clearances)
+    ''')
+    conn.commit()
+    conn.close()
+
+
+def load_fixture(db_path):
+    """Read back the ids the scenarios pick from."""
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    cursor.execute('''
+        SELECT id, username FROM users
+        WHERE user_type = 'student' AND id NOT IN (SELECT student_id FROM submitted_clearances)
+        ORDER BY id
+    ''')
+    pending = cursor.fetchall()
+    cursor.execute("SELECT id, username FROM users WHERE user_type = 'student' AND password != 'x' ORDER BY id")
+    login = cursor.fetchall()
+    cursor.execute('SELECT id FROM requirements')
+    requirement_ids = [row[0] for row in cursor.fetchall()]
+    cursor.execute('SELECT id FROM submitted_clearances')
+    clearance_ids = [row[0] for row in cursor.fetchall()]
+    conn.close()
+    return {'pending': pending, 'login': login, 'requirements': requirement_ids, 'clearances': clearance_ids}
+
+
+class TestClientDriver:
+    """Sends requests through Flask's test client, one client per thread."""
+
+    def __init__(self):
+        self.local = threading.local()
+
+    def client(self, user_id=None, user_type=None):
+        key = (user_id, user_type)
+        clients = self.local.__dict__.setdefault('clients', {})
+        if key not in clients:
+            client = clearance_app.app.test_client()
+            if user_id is not None:
+                with client.session_transaction() as sess:
+                    sess['user_id'] = user_id
+                    sess['user_type'] = user_type
+            clients[key] = client
+        return clients[key]
+
+    def get(self, path, user_id=None, user_type=None):
+        response = self.client(user_id, user_type).get(path)
+        body = response.get_data()  # drain streamed bodies
+        return response.status_code, len(body)
+
+    def post(self, path, json_body=None, form=None, user_id=None, user_type=None, remote_addr=None):
+        environ = {'REMOTE_ADDR': remote_addr} if remote_addr else {}
+        response = self.client(user_id, user_type).post(path, json=json_body, data=form, environ_base=environ)
+        return response.status_code, len(response.get_data())
+
+
+class HttpDriver:
+    """Sends requests to a running server. Each user logs in once and the
+    session is shared by all threads, so the login throttle is not hit."""
+
+    def __init__(self, base_url, fixture):
+        self.base_url = base_url.rstrip('/')
+        self.usernames = {row[0]: row[1] for row in fixture['login']}
+        self.openers = {}
+        self.lock = threading.Lock()
+
+    def opener(self, user_id=None, user_type=None):
+        key = (user_id, user_type)
+        with self.lock:
+            if key not in self.openers:
+                opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()))
+                if user_type == 'admin':
+                    self.login(opener, *ADMIN)
+                elif user_type == 'student':
+                    username = self.usernames[user_id]
+                    self.login(opener, username, username)
+                self.openers[key] = opener
+            return self.openers[key]
+
+    def warm_up(self):
+        # Log every user in before timing starts, while the per-address
+        # login throttle still has its full burst available
+        self.opener(1, 'admin')
+        for user_id in self.usernames:
+            self.opener(user_id, 'student')
+
+    def login(self, opener, username, password):
+        data = urllib.parse.urlencode({'username': username, 'password': password}).encode()
+        opener.open(self.base_url + '/login', data=data).read()
+
+    def send(self, opener, request):
+        try:
+            with opener.open(request) as response:
+                return response.status, len(response.read())
+        except urllib.error.HTTPError as e:
+            return e.code, len(e.read())
+
+    def get(self, path, user_id=None, user_type=None):
+        return self.send(self.opener(user_id, user_type), urllib.request.Request(self.base_url + path))
+
+    def post(self, path, json_body=None, form=None, user_id=None, user_type=None, remote_addr=None):
+        if json_body is not None:
+            request = urllib.request.Request(self.base_url + path, data=json.dumps(json_body).encode(),
+                                             headers={'Content-Type': 'application/json'})
+        else:
+            request = urllib.request.Request(self.base_url + path, data=urllib.parse.urlencode(form).encode())
+        opener = self.opener(user_id, user_type) if user_type else urllib.request.build_opener()
+        return self.send(opener, request)
+
+
+def scenarios(driver, fixture, over_http=False):
+    """Map endpoint names to callables issuing one request each."""
+    login = fixture['login']
+    # A real server needs students to log in, so only those with passwords
+    pending = login if over_http else fixture['pending']
+
+    def login_request(i, rng):
+        # Spread attempts over client addresses so the per-IP throttle
+        # measures hashing rather than rejecting the benchmark. A real
+        # server sees one address, so expect 429s there past the burst.
+        # Usernames are cycled rather than drawn at random, so with at
+        # least --concurrency login users no username has two attempts in
+        # flight and its bucket is never drained.
+        username = login[i % len(login)][1]
+        return driver.post('/login', form={'username': username, 'password': username},
+                           remote_addr=f'10.{i // 65536 % 256}.{i // 256 % 256}.{i % 256}')
+
+    def students_request(i, rng):
+        return driver.get('/api/students?limit=50', user_id=1, user_type='admin')
+
+    def student_requirements_request(i, rng):
+        student_id = rng.choice(pending)[0]
+        return driver.get('/api/student-requirements', user_id=student_id, user_type='student')
+
+    def toggle_request(i, rng):
+        body = {'student_id': rng.choice(pending)[0],
+                'requirement_id': rng.choice(fixture['requirements']),
+                'completed': rng.random() < 0.5}
+        return driver.post('/api/student-requirement', json_body=body, user_id=1, user_type='admin')
+
+    def csv_request(i, rng):
+        return driver.get('/download-all-clearances', user_id=1, user_type='admin')
+
+    def pdf_request(i, rng):
+        clearance_id = rng.choice(fixture['clearances'])
+        return driver.get(f'/api/download-clearance/{clearance_id}', user_id=1, user_type='admin')
+
+    available = {
+        'login': (login_request, bool(login)),
+        'students': (students_request, True),
+        'student_requirements': (student_requirements_request, bool(pending)),
+        'toggle': (toggle_request, bool(pending and fixture['requirements'])),
+        'csv': (csv_request, True),
+        'pdf': (pdf_request, bool(fixture['clearances'])),
+    }
+    return {name: func for name, (func, usable) in available.items() if usable}
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def drive(func, requests, concurrency, seed_value):
+    """Issue ``requests`` calls of ``func`` from ``concurrency`` threads."""
+    def worker(worker_id):
+        rng = random.Random(seed_value + worker_id)
+        timings, errors, failure = [], 0, None
+        for i in range(worker_id, requests, concurrency):
+            start = time.perf_counter()
+            try:
+                status, _ = func(i, rng)
+                if status >= 400:
+                    failure = failure or f'HTTP {status}'
+            except Exception as e:
+                status = None
+                failure = failure or repr(e)
+            timings.append(time.perf_counter() - start)
+            if status is None or status >= 400:
+                errors += 1
+        return timings, errors, failure
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(worker, range(concurrency)))
+    wall = time.perf_counter() - started
+
+    timings = sorted(t for worker_timings, _, _ in results for t in worker_timings)
+    failures = [failure for _, _, failure in results if failure]
+    return {
+        'requests': len(timings),
+        'errors': sum(errors for _, errors, _ in results),
+        'first_error': failures[0] if failures else None,
+        'p50_ms': round(percentile(timings, 0.50) * 1000, 2),
+        'p95_ms': round(percentile(timings, 0.95) * 1000, 2),
+        'p99_ms': round(percentile(timings, 0.99) * 1000, 2),
+        'mean_ms': round(sum(timings) / len(timings) * 1000, 2),
+        'max_ms': round(timings[-1] * 1000, 2),
+        'throughput_rps': round(len(timings) / wall, 1),
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def print_results(results, baseline=None):
+    header = f'{"endpoint":<22} {"n":>6} {"err":>5} {"p50 ms":>9} {"p95 ms":>9} {"p99 ms":>9} {"req/s":>8}'
+    if baseline:
+        header += f' {"p95 vs base":>12}'
+    print(header)
+    for name, stats in results.items():
+        line = (f'{name:<22} {stats["requests"]:>6} {stats["errors"]:>5} {stats["p50_ms"]:>9.2f} '
+                f'{stats["p95_ms"]:>9.2f} {stats["p99_ms"]:>9.2f} {stats["throughput_rps"]:>8.1f}')
+        base = (baseline or {}).get(name)
+        if base:
+            change = (stats['p95_ms'] - base['p95_ms']) / base['p95_ms'] * 100 if base['p95_ms'] else 0
+            line += f' {change:>+11.1f}%'
+        print(line)
+        if stats['first_error']:
+            print(f'{"":<22} first error: {stats["first_error"]}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--students', type=int, default=5000)
+    parser.add_argument('--requirements', type=int, default=8)
+    parser.add_argument('--submitted', type=int, default=None,
+                        help='students with a submitted clearance (default: a tenth of --students)')
+    parser.add_argument('--login-users', type=int, default=50, help='students seeded with a real password hash')
+    parser.add_argument('--requests', type=int, default=200, help='requests per endpoint')
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--endpoints', default=','.join(ENDPOINTS),
+                        help='comma-separated subset of ' + ', '.join(ENDPOINTS))
+    parser.add_argument('--seed', type=int, default=1, help='random seed for data and request mix')
+    parser.add_argument('--db', help='database file to seed or reuse (default: a temporary file)')
+    parser.add_argument('--seed-only', action='store_true', help='seed --db and exit')
+    parser.add_argument('--url', help='base URL of a running server to drive instead of the test client')
+    parser.add_argument('--output', help='where to save the results JSON (default: benchmarks/results/)')
+    parser.add_argument('--compare', help='earlier results JSON to compare p95 latency against')
+    args = parser.parse_args()
+    if args.submitted is None:
+        args.submitted = args.students // 10
+    elif not 0 <= args.submitted < args.students:
+        parser.error('--submitted must be below --students, or no students are left pending or able to log in')
+
+    requested = {name.strip() for name in args.endpoints.split(',') if name.strip()}
+    unknown = requested - set(ENDPOINTS)
+    if unknown:
+        parser.error('unknown endpoints: ' + ', '.join(sorted(unknown)))
+    endpoints = [name for name in ENDPOINTS if name in requested]
+
+    workdir = tempfile.mkdtemp(prefix='load-bench-')
+    db_path = os.path.abspath(args.db or os.path.join(workdir, 'clearance_system.db'))
+    output = os.path.abspath(args.output) if args.output else None
+    compare = os.path.abspath(args.compare) if args.compare else None
+    # Keep PDF cache files and uploads out of the working tree
+    os.chdir(workdir)
+    clearance_app.app.config['PDF_CACHE_DIR'] = os.path.join(workdir, 'pdf_cache')
+
+    if not (args.url and os.path.exists(db_path)):
+        if os.path.exists(db_path):
+            parser.error(f'{db_path} already exists; remove it or pass --url to reuse it')
+        started = time.perf_counter()
+        seed(db_path, args.students, args.requirements, args.submitted,
+             min(args.login_users, args.students), random.Random(args.seed))
+        print(f'seeded {args.students} students, {args.requirements} requirements, '
+              f'{args.submitted} submitted in {time.perf_counter() - started:.1f}s')
+        if args.seed_only:
+            return
+    clearance_app.app.config['DATABASE'] = db_path
+
+    fixture = load_fixture(db_path)
+    if args.url:
+        driver = HttpDriver(args.url, fixture)
+        driver.warm_up()
+    else:
+        driver = TestClientDriver()
+    available = scenarios(driver, fixture, over_http=bool(args.url))
+
+    if 'login' in endpoints and 0 < len(fixture['login']) < args.concurrency:
+        print(f'warning: only {len(fixture["login"])} login users for concurrency {args.concurrency}; '
+              'concurrent attempts on one username may be throttled (HTTP 429)')
+
+    results = {}
+    for name in endpoints:
+        if name not in available:
+            print(f'skipping {name}: no data for it')
+            continue
+        results[name] = drive(available[name], args.requests, args.concurrency, args.seed)
+
+    baseline = None
+    if compare:
+        with open(compare) as f:
+            baseline = json.load(f)['results']
+    print_results(results, baseline)
+
+    revision = git_revision()
+    report = {
+        'revision': revision,
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'target': args.url or 'test-client',
+        'params': {key: getattr(args, key) for key in
+                   ('students', 'requirements', 'submitted', 'login_users', 'requests', 'concurrency', 'seed')},
+        'password_hash_method': clearance_app.app.config['PASSWORD_HASH_METHOD'],
+        'login_rate_per_ip': clearance_app.app.config['LOGIN_RATE_PER_IP'],
+        'login_rate_per_username': clearance_app.app.config['LOGIN_RATE_PER_USERNAME'],
+        'cpu_count': os.cpu_count(),
+        'results': results,
+    }
+    output = output or os.path.join(
+        RESULTS_DIR, f'{datetime.now().strftime("%Y%m%d-%H%M%S")}-{revision}.json')
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f'saved {output}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+"""Certificate rendering benchmark.
+
+Renders the same synthetic clearance repeatedly through
+render_clearance_pdf() in this process and reports CPU time per PDF, so
+changes to the certificate layout code can be compared across commits.
+Results are saved as JSON under benchmarks/results/ like load.py's.
+
+    python benchmarks/pdf.py --count 500 --requirements 12
+    python benchmarks/pdf.py --signature static/uploads/<file>.png --compare benchmarks/results/<earlier>.json
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import app as clearance_app
+from load import RESULTS_DIR, git_revision
+
+
+def make_clearance(requirements, signature):
+    names = [f'Requirement {i + 1:02d}' for i in range(requirements)]
+    return ('Maria Santos', '0221-00042', names, signature, '2025-05-30 14:21:07')
+
+
+def measure(clearance, count, warmup):
+    for _ in range(warmup):
+        clearance_app.render_clearance_pdf(clearance)
+    cpu_times = []
+    started = time.perf_counter()
+    for _ in range(count):
+        cpu_started = time.process_time()
+        pdf = clearance_app.render_clearance_pdf(clearance)
+        cpu_times.append(time.process_time() - cpu_started)
+    wall = time.perf_counter() - started
+    return {
+        'count': count,
+        'cpu_ms_mean': round(statistics.mean(cpu_times) * 1000, 3),
+        'cpu_ms_median': round(statistics.median(cpu_times) * 1000, 3),
+        'pdfs_per_s': round(count / wall, 1),
+        'pdf_bytes': len(pdf),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--count', type=int, default=300, help='PDFs to render')
+    parser.add_argument('--warmup', type=int, default=20, help='untimed renders first')
+    parser.add_argument('--requirements', type=int, default=8, help='completed requirements on the certificate')
+    parser.add_argument('--signature', default=None, help='signature template path, as stored in the database')
+    parser.add_argument('--output', default=None, help='where to save the JSON results')
+    parser.add_argument('--compare', default=None, help='earlier results file to compare against')
+    args = parser.parse_args()
+
+    # Signature paths are relative to the app root, as in the server
+    compare = os.path.abspath(args.compare) if args.compare else None
+    output = os.path.abspath(args.output) if args.output else None
+    os.chdir(ROOT)
+
+    clearance = make_clearance(args.requirements, args.signature)
+    result = measure(clearance, args.count, args.warmup)
+    print(f'{result["count"]} PDFs: {result["cpu_ms_mean"]:.2f} ms CPU mean, '
+          f'{result["cpu_ms_median"]:.2f} ms median, {result["pdfs_per_s"]:.0f} PDFs/s, '
+          f'{result["pdf_bytes"]} bytes each')
+    if compare:
+        with open(compare) as f:
+            baseline = json.load(f)['result']
+        change = (result['cpu_ms_mean'] - baseline['cpu_ms_mean']) / baseline['cpu_ms_mean'] * 100
+        print(f'baseline {baseline["cpu_ms_mean"]:.2f} ms CPU mean: {change:+.1f}%')
+
+    revision = git_revision()
+    report = {
+        'revision': revision,
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'params': {key: getattr(args, key) for key in ('count', 'warmup', 'requirements', 'signature')},
+        'result': result,
+    }
+    output = output or os.path.join(
+        RESULTS_DIR, f'pdf-{datetime.now().strftime("%Y%m%d-%H%M%S")}-{revision}.json')
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f'saved {output}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+"""Roster benchmark for /api/students.
+
+Seeds a throwaway database with N students and times the admin roster
+endpoint, so query-count regressions show up as latency growing with N.
+
+    python benchmarks/roster.py 100 1000 10000 50000
+"""
+import os
+import sys
+import sqlite3
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as clearance_app
+
+REQUIREMENTS = ['Library', 'Laboratory', 'Guidance', 'Registrar', 'Accounting', 'SBO']
+
+
+def seed(student_count):
+    conn = sqlite3.connect('clearance_system.db')
+    cursor = conn.cursor()
+    cursor.executemany('INSERT INTO requirements (name) VALUES (?)', [(name,) for name in REQUIREMENTS])
+    cursor.executemany(
+        'INSERT INTO users (username, password, name, user_type, course, year, major, section) VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+        [(f'022{i % 10}-{i:05d}', 'x', f'Student {i:05d}', 'student', 'IT', i % 4 + 1, '', 'ABCD'[i % 4])
+         for i in range(student_count)])
+    cursor.execute('''
+        INSERT INTO student_requirements (student_id, requirement_id, completed)
+        SELECT u.id, r.id, (u.id + r.id) % 2
+        FROM users u CROSS JOIN requirements r
+        WHERE u.user_type = 'student'
+    ''')
+    conn.commit()
+    conn.close()
+
+
+def run(student_count, repeat=5):
+    workdir = tempfile.mkdtemp(prefix='roster-bench-')
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        clearance_app.init_db()
+        seed(student_count)
+        client = clearance_app.app.test_client()
+        with client.session_transaction() as sess:
+            sess['user_id'] = 1
+            sess['user_type'] = 'admin'
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            response = client.get('/api/students')
+            timings.append(time.perf_counter() - start)
+            assert response.status_code == 200
+        timings.sort()
+        return timings[len(timings) // 2], len(response.get_json()['students'])
+    finally:
+        os.chdir(cwd)
+
+
+if __name__ == '__main__':
+    sizes = [int(arg) for arg in sys.argv[1:]] or [100, 1000, 10000, 50000]
+    print(f'{"students":>10} {"median ms":>10} {"ms/1k":>8}')
+    for size in sizes:
+        median, returned = run(size)
+        print(f'{returned:>10} {median * 1000:>10.1f} {median * 1000000 / max(returned, 1):>8.2f}')
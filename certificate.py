@@ -0,0 +1,219 @@
+"""Clearance certificate rendering.
+
+Fonts, text styles and the fixed parts of the page are set up once at
+import, and render() draws only the student's details, requirement list
+and signature straight onto a canvas. Building a platypus story, a style
+sheet and a document template for every PDF cost more than the drawing
+itself. Signature images are prepared once and the readers reused.
+"""
+import os
+import threading
+from collections import OrderedDict, namedtuple
+from io import BytesIO
+
+from reportlab import rl_config
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.utils import ImageReader, simpleSplit
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from reportlab.pdfgen import canvas
+from PIL import Image
+
+# ReportLab ASCII85-encodes every stream by default, in pure Python when its
+# C extension is missing. PDFs are served as binary, so skip it.
+rl_config.useA85 = 0
+
+TextStyle = namedtuple('TextStyle', 'font size leading space_after')
+
+PAGE_WIDTH, PAGE_HEIGHT = letter
+LEFT_MARGIN = RIGHT_MARGIN = TOP_MARGIN = 72
+BOTTOM_MARGIN = 54
+TEXT_WIDTH = PAGE_WIDTH - LEFT_MARGIN - RIGHT_MARGIN
+
+TITLE_STYLE = TextStyle('Helvetica-Bold', 18, 22, 30)
+BODY_STYLE = TextStyle('Helvetica', 12, 14, 12)
+LABEL_STYLE = BODY_STYLE._replace(font='Helvetica-Bold')
+
+TITLE = 'STUDENT CLEARANCE CERTIFICATE'
+BULLET = '• '
+BULLET_WIDTH = stringWidth(BULLET, BODY_STYLE.font, BODY_STYLE.size)
+# (label, index into the clearance tuple, label width) for the student details
+DETAIL_FIELDS = [
+    (label, index, stringWidth(label + ' ', LABEL_STYLE.font, LABEL_STYLE.size))
+    for label, index in (('Student Name:', 0), ('Student Number:', 1), ('Date of Submission:', 4))
+]
+
+SIGNATURE_MAX_WIDTH = 200
+SIGNATURE_MAX_HEIGHT = 80
+# Signatures are stored at twice their printed size so they stay sharp
+SIGNATURE_SCALE = 2
+SIGNATURE_JPEG_QUALITY = 85
+SIGNATURE_LINE_WIDTH = 220
+MAX_SIGNATURE_IMAGES = 8
+
+_signature_images = OrderedDict()
+_signature_lock = threading.Lock()
+
+
+def prepare_signature(source):
+    """Decode a signature image (a path or file object), flatten it onto
+    white, fit it to the signature slot and return it as JPEG bytes.
+    ReportLab embeds JPEG data as-is, while any other image is recompressed
+    on every certificate. Raises ValueError if it is not a usable image."""
+    try:
+        with Image.open(source) as image:
+            image.thumbnail((SIGNATURE_MAX_WIDTH * SIGNATURE_SCALE, SIGNATURE_MAX_HEIGHT * SIGNATURE_SCALE))
+            image = image.convert('RGBA')
+    except (OSError, Image.DecompressionBombError) as e:
+        raise ValueError(f'Not a usable image: {e}') from e
+    flattened = Image.new('RGB', image.size, 'white')
+    flattened.paste(image, mask=image.getchannel('A'))
+    buffer = BytesIO()
+    flattened.save(buffer, 'JPEG', quality=SIGNATURE_JPEG_QUALITY, optimize=True)
+    return buffer.getvalue()
+
+
+def is_prepared_signature(data):
+    """Whether ``data`` is already what prepare_signature() produces, as
+    for every file uploaded since uploads are prepared on arrival."""
+    try:
+        with Image.open(BytesIO(data)) as image:
+            return (image.format == 'JPEG' and image.mode == 'RGB'
+                    and image.width <= SIGNATURE_MAX_WIDTH * SIGNATURE_SCALE
+                    and image.height <= SIGNATURE_MAX_HEIGHT * SIGNATURE_SCALE)
+    except (OSError, Image.DecompressionBombError):
+        return False
+
+
+class SignatureImage(ImageReader):
+    """ImageReader over prepared JPEG bytes that can be shared between
+    threads: pixels are decoded up front, and each embed reads the JPEG
+    from its own buffer instead of the reader's single file position."""
+
+    def __init__(self, data):
+        super().__init__(BytesIO(data))
+        self.data = data
+        # drawImage() hashes the pixels to name the image; decode them now
+        self.getRGBData()
+
+    def jpeg_fh(self):
+        return BytesIO(self.data)
+
+
+def signature_image(signature_template):
+    """Return the SignatureImage for a stored signature path, or None if
+    the file is missing or unreadable. Readers are cached per path and
+    rebuilt when the file changes, so a certificate never decodes or
+    recompresses the image itself."""
+    path = signature_template.lstrip('/')
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    fingerprint = (stat.st_size, stat.st_mtime_ns)
+    with _signature_lock:
+        cached = _signature_images.get(path)
+        if cached and cached[0] == fingerprint:
+            _signature_images.move_to_end(path)
+            return cached[1]
+
+    try:
+        with open(path, 'rb') as f:
+            data = f.read()
+        # Files uploaded before uploads were prepared may be full size
+        image = SignatureImage(data if is_prepared_signature(data) else prepare_signature(BytesIO(data)))
+    except (OSError, ValueError):
+        image = None
+    with _signature_lock:
+        _signature_images[path] = (fingerprint, image)
+        while len(_signature_images) > MAX_SIGNATURE_IMAGES:
+            _signature_images.popitem(last=False)
+    return image
+
+
+class CertificateWriter:
+    """Tracks the write position on a canvas and starts a new page when
+    the next block would run into the bottom margin."""
+
+    def __init__(self, pdf):
+        self.pdf = pdf
+        self.y = PAGE_HEIGHT - TOP_MARGIN
+
+    def ensure_space(self, height):
+        if self.y - height < BOTTOM_MARGIN:
+            self.pdf.showPage()
+            self.y = PAGE_HEIGHT - TOP_MARGIN
+
+    def skip(self, height):
+        self.y -= height
+
+    def text(self, text, style=BODY_STYLE, label=None, label_width=0, indent=0):
+        """Write ``text``, wrapped to the text width, optionally after a
+        bold ``label`` or with a hanging ``indent``."""
+        lines = simpleSplit(text, style.font, style.size, TEXT_WIDTH - label_width - indent) or ['']
+        for number, line in enumerate(lines):
+            self.ensure_space(style.leading)
+            self.y -= style.size
+            if number == 0 and label:
+                self.pdf.setFont(LABEL_STYLE.font, LABEL_STYLE.size)
+                self.pdf.drawString(LEFT_MARGIN, self.y, label)
+            self.pdf.setFont(style.font, style.size)
+            self.pdf.drawString(LEFT_MARGIN + label_width + indent, self.y, line)
+            self.y -= style.leading - style.size
+        self.y -= style.space_after
+
+    def bullet(self, text):
+        self.ensure_space(BODY_STYLE.leading)
+        self.pdf.setFont(BODY_STYLE.font, BODY_STYLE.size)
+        self.pdf.drawString(LEFT_MARGIN, self.y - BODY_STYLE.size, BULLET)
+        self.text(text, indent=BULLET_WIDTH)
+
+    def signature(self, image):
+        height = SIGNATURE_MAX_HEIGHT + BODY_STYLE.leading + 6
+        self.ensure_space(height)
+        if image is not None:
+            image_width, image_height = image.getSize()
+            scale = min(SIGNATURE_MAX_WIDTH / image_width, SIGNATURE_MAX_HEIGHT / image_height, 1)
+            self.pdf.drawImage(image, LEFT_MARGIN, self.y - SIGNATURE_MAX_HEIGHT,
+                               image_width * scale, image_height * scale)
+        self.y -= SIGNATURE_MAX_HEIGHT + 4
+        self.pdf.setLineWidth(0.75)
+        self.pdf.line(LEFT_MARGIN, self.y, LEFT_MARGIN + SIGNATURE_LINE_WIDTH, self.y)
+        self.y -= 2
+        self.text('Authorized Signatory')
+
+
+def render(clearance):
+    """Render a clearance certificate and return the PDF bytes.
+
+    ``clearance`` is a (student_name, student_number, completed_requirements,
+    signature_template, submitted_date) tuple, where completed_requirements
+    is a list of names.
+    """
+    buffer = BytesIO()
+    pdf = canvas.Canvas(buffer, pagesize=letter)
+    pdf.setTitle(f'Clearance Certificate - {clearance[0]}')
+    writer = CertificateWriter(pdf)
+
+    pdf.setFont(TITLE_STYLE.font, TITLE_STYLE.size)
+    writer.skip(TITLE_STYLE.size)
+    pdf.drawCentredString(PAGE_WIDTH / 2, writer.y, TITLE)
+    writer.skip(TITLE_STYLE.leading - TITLE_STYLE.size + TITLE_STYLE.space_after + 12)
+
+    for label, index, label_width in DETAIL_FIELDS:
+        writer.text(str(clearance[index]), label=label, label_width=label_width)
+    writer.skip(20)
+
+    writer.text('Completed Requirements:', LABEL_STYLE)
+    writer.skip(12)
+    for name in clearance[2]:
+        writer.bullet(name)
+    writer.skip(30)
+
+    if clearance[3]:
+        writer.text('Authorized Signatures:', LABEL_STYLE)
+        writer.skip(12)
+        writer.signature(signature_image(clearance[3]))
+
+    pdf.showPage()
+    pdf.save()
+    return buffer.getvalue()
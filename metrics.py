@@ -0,0 +1,123 @@
+"""In-process metrics rendered in the Prometheus text format.
+
+Only what app.py needs: counters, histograms with fixed buckets, and
+collectors that report values kept elsewhere. Every metric is guarded by
+its own lock, so request threads can record concurrently.
+"""
+import math
+import threading
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+
+def format_labels(names, values):
+    if not names:
+        return ''
+    pairs = []
+    for name, value in zip(names, values):
+        escaped = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        pairs.append(f'{name}="{escaped}"')
+    return '{' + ','.join(pairs) + '}'
+
+
+def format_value(value):
+    if value == math.inf:
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels[name] for name in self.labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} counter']
+        with self.lock:
+            items = sorted(self.values.items())
+        for key, value in items:
+            lines.append(f'{self.name}{format_labels(self.labels, key)} {format_value(value)}')
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, documentation, labels=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets) + (math.inf,)
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(labels[name] for name in self.labels)
+        with self.lock:
+            series = self.values.get(key)
+            if series is None:
+                series = self.values[key] = {'counts': [0] * len(self.buckets), 'sum': 0, 'count': 0}
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series['counts'][index] += 1
+                    break
+            series['sum'] += value
+            series['count'] += 1
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} histogram']
+        with self.lock:
+            items = sorted((key, dict(series, counts=list(series['counts']))) for key, series in self.values.items())
+        for key, series in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, series['counts']):
+                cumulative += count
+                labels = format_labels(self.labels + ('le',), key + (format_value(bound),))
+                lines.append(f'{self.name}_bucket{labels} {cumulative}')
+            labels = format_labels(self.labels, key)
+            lines.append(f'{self.name}_sum{labels} {format_value(series["sum"])}')
+            lines.append(f'{self.name}_count{labels} {series["count"]}')
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+        self.collectors = []
+
+    def counter(self, name, documentation, labels=()):
+        metric = Counter(name, documentation, labels)
+        self.metrics.append(metric)
+        return metric
+
+    def histogram(self, name, documentation, labels=(), buckets=LATENCY_BUCKETS):
+        metric = Histogram(name, documentation, labels, buckets)
+        self.metrics.append(metric)
+        return metric
+
+    def collector(self, func):
+        """Register ``func`` to report values kept outside the registry. It
+        returns (name, type, documentation, value) tuples. Usable as a
+        decorator."""
+        self.collectors.append(func)
+        return func
+
+    def render(self):
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        for collect in self.collectors:
+            for name, kind, documentation, value in collect():
+                lines.append(f'# HELP {name} {documentation}')
+                lines.append(f'# TYPE {name} {kind}')
+                lines.append(f'{name} {format_value(value)}')
+        return '\n'.join(lines) + '\n'
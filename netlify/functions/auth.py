@@ -4,6 +4,16 @@ import os
 from datetime import datetime
 import bcrypt
 
+# bcrypt cost factor; hashes with a different cost are upgraded on login
+BCRYPT_ROUNDS = int(os.environ.get('BCRYPT_ROUNDS', '12'))
+
+def hash_password(password):
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds=BCRYPT_ROUNDS)).decode('utf-8')
+
+def needs_rehash(password_hash):
+    # bcrypt hashes look like $2b$12$..., where 12 is the cost
+    return int(password_hash.split('$')[2]) != BCRYPT_ROUNDS
+
 def handler(event, context):
     # CORS headers
     headers = {
@@ -107,7 +117,7 @@ def init_db():
     ''')
     
     # Insert single admin user
-    admin_password = bcrypt.hashpw('ronron1234'.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+    admin_password = hash_password('ronron1234')
     cursor.execute('INSERT OR IGNORE INTO users (username, password, name, user_type) VALUES (?, ?, ?, ?)',
                   ('ronronadmin', admin_password, 'Ron', 'admin'))
     
@@ -123,9 +133,12 @@ def handle_login(event, headers):
     cursor = conn.cursor()
     cursor.execute('SELECT id, password, name, user_type FROM users WHERE username = ?', (username,))
     user = cursor.fetchone()
-    conn.close()
     
     if user and bcrypt.checkpw(password.encode('utf-8'), user[1].encode('utf-8')):
+        if needs_rehash(user[1]):
+            cursor.execute('UPDATE users SET password = ? WHERE id = ?', (hash_password(password), user[0]))
+            conn.commit()
+        conn.close()
         session_data = {
             'user_id': user[0],
             'username': username,
@@ -142,6 +155,7 @@ def handle_login(event, headers):
             })
         }
     else:
+        conn.close()
         return {
             'statusCode': 401,
             'headers': headers,
@@ -170,7 +184,7 @@ def handle_register(event, headers):
             'body': json.dumps({'success': False, 'message': 'Student number already registered'})
         }
     
-    password_hash = bcrypt.hashpw(student_number.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+    password_hash = hash_password(student_number)
     cursor.execute('INSERT INTO users (username, password, name, user_type, course, year, major, section) VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
                   (student_number, password_hash, name, 'student', course, year, major, section))
     conn.commit()
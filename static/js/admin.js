@@ -25,6 +25,8 @@ function showTab(tabName) {
         loadAllStudentsList();
     } else if (tabName === 'clearances') {
         loadSubmittedClearances();
+    } else if (tabName === 'progress') {
+        loadProgressReport();
     }
 }
 
@@ -175,33 +177,239 @@ async function uploadSignature() {
     }
 }
 
+// Bulk Student Import
+async function importStudents() {
+    const fileInput = document.getElementById('roster-upload');
+    const file = fileInput.files[0];
+    const resultDiv = document.getElementById('import-result');
+    
+    if (!file) {
+        alert('Please select a CSV file');
+        return;
+    }
+    
+    const formData = new FormData();
+    formData.append('roster', file);
+    resultDiv.textContent = 'Importing...';
+    
+    try {
+        const response = await fetch('/api/students/import', {
+            method: 'POST',
+            body: formData
+        });
+        
+        const result = await response.json();
+        if (!result.success) {
+            resultDiv.textContent = result.message || 'Import failed';
+            return;
+        }
+        
+        let html = `<p>Imported ${result.imported} of ${result.rows} rows in ${(result.elapsed_ms / 1000).toFixed(1)}s ` +
+            `(${result.duplicate_count} duplicates, ${result.error_count} errors)</p>`;
+        if (result.errors.length > 0) {
+            html += '<ul>' + result.errors.map(e => `<li>Line ${e.line}: ${e.message}</li>`).join('') + '</ul>';
+        }
+        if (result.duplicates.length > 0) {
+            html += '<ul>' + result.duplicates.map(d => `<li>Line ${d.line}: ${d.student_number} already exists</li>`).join('') + '</ul>';
+        }
+        resultDiv.innerHTML = html;
+        fileInput.value = '';
+        
+        if (result.imported > 0) {
+            loadAllStudentsList();
+        }
+    } catch (error) {
+        resultDiv.textContent = 'Error importing students: ' + error.message;
+    }
+}
+
 // Student Management
-async function loadStudentsList(filters = {}) {
+const STUDENTS_PAGE_SIZE = 50;
+let studentsState = { filters: {}, requirements: [], students: {}, nextCursor: null, total: 0, revision: null };
+
+async function loadStudentsList(filters = {}, append = false) {
     try {
-        const queryParams = new URLSearchParams(filters);
+        const params = { ...filters, limit: STUDENTS_PAGE_SIZE };
+        if (append && studentsState.nextCursor) {
+            params.cursor = studentsState.nextCursor;
+        }
+        const queryParams = new URLSearchParams(params);
         const response = await fetch(`/api/students?${queryParams}`);
         const data = await response.json();
         
         const container = document.getElementById('students-list');
-        container.innerHTML = '';
+        if (!append) {
+            container.innerHTML = '';
+            studentsState = { filters: filters, requirements: data.requirements, students: {}, nextCursor: null, total: 0, revision: data.revision };
+            populateBulkRequirementSelect(data.requirements);
+        }
+        studentsState.nextCursor = data.next_cursor;
+        studentsState.total = data.total;
         
-        if (data.students.length === 0) {
+        if (data.total === 0) {
             container.innerHTML = '<p class="no-students">No students found.</p>';
+            renderStudentsPager();
             return;
         }
         
         data.students.forEach(student => {
-            const studentCard = createStudentCard(student, data.requirements);
+            studentsState.students[student.id] = student;
+            const studentCard = createStudentCard(student, studentsState.requirements);
             container.appendChild(studentCard);
         });
+        renderStudentsPager();
     } catch (error) {
         console.error('Error loading students:', error);
     }
 }
 
+function populateBulkRequirementSelect(requirements) {
+    const select = document.getElementById('bulk-requirement');
+    const selected = select.value;
+    select.innerHTML = '<option value="">Select Requirement</option>' +
+        requirements.map(req => `<option value="${req.id}">${req.name}</option>`).join('');
+    select.value = selected;
+}
+
+async function bulkMarkRequirement(completed) {
+    const requirementId = document.getElementById('bulk-requirement').value;
+    if (!requirementId) {
+        alert('Please select a requirement');
+        return;
+    }
+    
+    const action = completed ? 'complete' : 'incomplete';
+    if (!confirm(`Mark this requirement as ${action} for all ${studentsState.total} filtered students?`)) {
+        return;
+    }
+    
+    try {
+        const response = await fetch('/api/student-requirement/bulk', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+            },
+            body: JSON.stringify({
+                filter: studentsState.filters,
+                requirement_id: parseInt(requirementId),
+                completed: completed
+            })
+        });
+        
+        const result = await response.json();
+        if (result.success) {
+            loadStudentsList(studentsState.filters);
+            alert(`Updated ${result.updated} students.`);
+        } else {
+            alert(result.message || 'Failed to update requirements');
+        }
+    } catch (error) {
+        alert('Error updating requirements: ' + error.message);
+    }
+}
+
+async function bulkSubmitClearances() {
+    if (!confirm('Submit clearances for every filtered student who has completed all requirements?')) {
+        return;
+    }
+    
+    try {
+        const response = await fetch('/api/submit-clearance/bulk', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+            },
+            body: JSON.stringify({ filter: studentsState.filters })
+        });
+        
+        const result = await response.json();
+        if (result.success) {
+            loadStudentsList(studentsState.filters);
+            alert(`Submitted ${result.moved} clearances in ${result.elapsed_ms} ms.`);
+        } else {
+            alert(result.message || 'Failed to submit clearances');
+        }
+    } catch (error) {
+        alert('Error submitting clearances: ' + error.message);
+    }
+}
+
+// Fetch only the students that changed since the last load or sync
+async function syncStudentsList() {
+    if (studentsState.revision === null || studentsState.revision === undefined) {
+        return loadStudentsList(studentsState.filters);
+    }
+    
+    try {
+        const params = { ...studentsState.filters, since: studentsState.revision };
+        const response = await fetch(`/api/students?${new URLSearchParams(params)}`);
+        const data = await response.json();
+        
+        if (data.reset) {
+            loadStudentsList(studentsState.filters);
+            return;
+        }
+        
+        data.removed.forEach(studentId => removeStudentCard(studentId));
+        data.students.forEach(student => {
+            if (studentsState.students[student.id]) {
+                studentsState.students[student.id] = student;
+                refreshStudentCard(student.id);
+            } else if (!studentsState.nextCursor) {
+                // Everything is loaded, so a newly matching student belongs at the end
+                studentsState.students[student.id] = student;
+                studentsState.total += 1;
+                document.getElementById('students-list').appendChild(createStudentCard(student, studentsState.requirements));
+            }
+        });
+        studentsState.revision = data.revision;
+        renderStudentsPager();
+    } catch (error) {
+        console.error('Error syncing students:', error);
+    }
+}
+
+function loadMoreStudents() {
+    loadStudentsList(studentsState.filters, true);
+}
+
+function renderStudentsPager() {
+    const pager = document.getElementById('students-pager');
+    const shown = Object.keys(studentsState.students).length;
+    if (studentsState.total === 0) {
+        pager.innerHTML = '';
+        return;
+    }
+    pager.innerHTML = `
+        <span>Showing ${shown} of ${studentsState.total} students</span>
+        ${studentsState.nextCursor ? '<button onclick="loadMoreStudents()" class="btn-primary">Load More</button>' : ''}
+    `;
+}
+
+function refreshStudentCard(studentId) {
+    const student = studentsState.students[studentId];
+    const card = document.querySelector(`.student-card[data-student-id="${studentId}"]`);
+    if (student && card) {
+        card.replaceWith(createStudentCard(student, studentsState.requirements));
+    }
+}
+
+function removeStudentCard(studentId) {
+    const card = document.querySelector(`.student-card[data-student-id="${studentId}"]`);
+    if (card) {
+        card.remove();
+    }
+    if (studentsState.students[studentId]) {
+        delete studentsState.students[studentId];
+        studentsState.total -= 1;
+    }
+    renderStudentsPager();
+}
+
 function createStudentCard(student, requirements) {
     const card = document.createElement('div');
     card.className = 'student-card';
+    card.dataset.studentId = student.id;
     
     const completedReqs = student.requirements.filter(r => r.completed);
     const allCompleted = completedReqs.length === requirements.length && requirements.length > 0;
@@ -264,7 +472,16 @@ async function toggleStudentRequirement(studentId, requirementId, completed) {
         
         const result = await response.json();
         if (result.success) {
-            loadStudentsList(getCurrentFilters());
+            const student = studentsState.students[studentId];
+            if (student) {
+                const existing = student.requirements.find(r => r.requirement_id === requirementId);
+                if (existing) {
+                    existing.completed = completed;
+                } else {
+                    student.requirements.push({ requirement_id: requirementId, completed: completed });
+                }
+                refreshStudentCard(studentId);
+            }
         } else {
             alert(result.message || 'Failed to update requirement');
         }
@@ -285,7 +502,7 @@ async function submitClearance(studentId) {
         
         const result = await response.json();
         if (result.success) {
-            loadStudentsList(getCurrentFilters());
+            removeStudentCard(studentId);
             alert('Clearance submitted successfully!');
         } else {
             alert(result.message || 'Failed to submit clearance');
@@ -300,50 +517,169 @@ function searchStudents() {
     loadStudentsList(filters);
 }
 
+// Filter options come from the facets endpoint rather than a fixed list
+async function loadFilterFacets() {
+    try {
+        const response = await fetch('/api/students/facets');
+        const facets = await response.json();
+        
+        ['course', 'year', 'major', 'section'].forEach(column => {
+            const select = document.getElementById(`filter-${column}`);
+            const selected = select.value;
+            select.length = 1;  // keep the "All ..." option
+            facets[column].forEach(facet => {
+                if (facet.value === '') return;
+                const option = document.createElement('option');
+                option.value = facet.value;
+                option.textContent = `${facet.value} (${facet.pending} pending)`;
+                select.appendChild(option);
+            });
+            select.value = selected;
+        });
+    } catch (error) {
+        console.error('Error loading filter options:', error);
+    }
+}
+
+// Suggest matching students while the admin types in the search box
+let suggestionTimer = null;
+
+function suggestStudents() {
+    clearTimeout(suggestionTimer);
+    const query = document.getElementById('search-student-number').value.trim();
+    if (query.length < 3) return;
+    
+    suggestionTimer = setTimeout(async () => {
+        try {
+            const response = await fetch(`/api/students/search?${new URLSearchParams({ q: query, limit: 10 })}`);
+            const data = await response.json();
+            const datalist = document.getElementById('student-suggestions');
+            datalist.innerHTML = '';
+            (data.students || []).forEach(student => {
+                const option = document.createElement('option');
+                option.value = student.student_number;
+                option.label = `${student.name}${student.submitted ? ' (submitted)' : ''}`;
+                datalist.appendChild(option);
+            });
+        } catch (error) {
+            console.error('Error searching students:', error);
+        }
+    }, 250);
+}
+
 function getCurrentFilters() {
     return {
-        student_number: document.getElementById('search-student-number').value,
+        search: document.getElementById('search-student-number').value,
         course: document.getElementById('filter-course').value,
         year: document.getElementById('filter-year').value,
         major: document.getElementById('filter-major').value,
-        section: document.getElementById('filter-section').value
+        section: document.getElementById('filter-section').value,
+        eligible: document.getElementById('filter-eligible').checked ? '1' : ''
     };
 }
 
-async function loadAllStudentsList() {
+// Progress Report
+function formatRate(rate) {
+    return rate === null ? '-' : `${(rate * 100).toFixed(1)}%`;
+}
+
+async function loadProgressReport() {
     try {
-        const response = await fetch('/api/all-students');
-        const students = await response.json();
+        const response = await fetch('/api/reports/progress');
+        const report = await response.json();
         
-        const container = document.getElementById('all-students-list');
-        container.innerHTML = '';
+        document.getElementById('progress-summary').innerHTML = `
+            <p><strong>${report.students}</strong> students: <strong>${report.cleared}</strong> cleared,
+            <strong>${report.pending}</strong> pending (${report.eligible} eligible to submit).
+            Pending students have completed ${formatRate(report.completion_rate)} of their requirements.</p>
+        `;
         
-        if (students.length === 0) {
-            container.innerHTML = '<p class="no-data">No students registered yet.</p>';
-            return;
+        const requirementsDiv = document.getElementById('progress-requirements');
+        if (report.requirements.length === 0) {
+            requirementsDiv.innerHTML = '<p class="no-data">No requirements posted yet.</p>';
+        } else {
+            requirementsDiv.innerHTML = `
+                <table class="students-table">
+                    <thead><tr><th>Requirement</th><th>Completed</th><th>Rate</th></tr></thead>
+                    <tbody>${report.requirements.map(req => `
+                        <tr><td>${req.name}</td><td>${req.completed} / ${report.pending}</td><td>${formatRate(req.rate)}</td></tr>
+                    `).join('')}</tbody>
+                </table>
+            `;
         }
         
-        // Create table
-        const table = document.createElement('table');
-        table.className = 'students-table';
+        const groupsDiv = document.getElementById('progress-groups');
+        if (report.groups.length === 0) {
+            groupsDiv.innerHTML = '<p class="no-data">No students registered yet.</p>';
+        } else {
+            groupsDiv.innerHTML = `
+                <table class="students-table">
+                    <thead><tr><th>Course</th><th>Year</th><th>Section</th><th>Students</th><th>Cleared</th><th>Requirements Done</th></tr></thead>
+                    <tbody>${report.groups.map(group => `
+                        <tr>
+                            <td>${group.course}</td><td>${group.year}</td><td>${group.section}</td>
+                            <td>${group.students}</td>
+                            <td>${group.cleared} (${formatRate(group.cleared_rate)})</td>
+                            <td>${formatRate(group.completion_rate)}</td>
+                        </tr>
+                    `).join('')}</tbody>
+                </table>
+            `;
+        }
+    } catch (error) {
+        console.error('Error loading progress report:', error);
+    }
+}
+
+let allStudentsCursor = null;
+
+async function loadAllStudentsList(append = false) {
+    try {
+        const params = { limit: STUDENTS_PAGE_SIZE };
+        if (append && allStudentsCursor) {
+            params.cursor = allStudentsCursor;
+        }
+        const response = await fetch(`/api/all-students?${new URLSearchParams(params)}`);
+        const data = await response.json();
+        allStudentsCursor = data.next_cursor;
         
-        // Create header
-        const thead = document.createElement('thead');
-        thead.innerHTML = `
-            <tr>
-                <th>Name</th>
-                <th>Student Number</th>
-                <th>Course</th>
-                <th>Year Level</th>
-                <th>Major</th>
-                <th>Section</th>
-            </tr>
-        `;
-        table.appendChild(thead);
+        const container = document.getElementById('all-students-list');
+        let tbody = container.querySelector('tbody');
+        
+        if (!append || !tbody) {
+            container.innerHTML = '';
+            
+            if (data.total === 0) {
+                container.innerHTML = '<p class="no-data">No students registered yet.</p>';
+                renderAllStudentsPager(0, 0);
+                return;
+            }
+            
+            // Create table
+            const table = document.createElement('table');
+            table.className = 'students-table';
+            
+            // Create header
+            const thead = document.createElement('thead');
+            thead.innerHTML = `
+                <tr>
+                    <th>Name</th>
+                    <th>Student Number</th>
+                    <th>Course</th>
+                    <th>Year Level</th>
+                    <th>Major</th>
+                    <th>Section</th>
+                </tr>
+            `;
+            table.appendChild(thead);
+            
+            tbody = document.createElement('tbody');
+            table.appendChild(tbody);
+            container.appendChild(table);
+        }
         
-        // Create body
-        const tbody = document.createElement('tbody');
-        students.forEach(student => {
+        // Append this page's rows
+        data.students.forEach(student => {
             const row = document.createElement('tr');
             row.innerHTML = `
                 <td><strong>${student.name}</strong></td>
@@ -356,32 +692,40 @@ async function loadAllStudentsList() {
             tbody.appendChild(row);
         });
         
-        table.appendChild(tbody);
-        container.appendChild(table);
+        renderAllStudentsPager(tbody.children.length, data.total);
         
     } catch (error) {
         console.error('Error loading all students:', error);
     }
 }
 
+function renderAllStudentsPager(shown, total) {
+    const pager = document.getElementById('all-students-pager');
+    if (total === 0) {
+        pager.innerHTML = '';
+        return;
+    }
+    pager.innerHTML = `
+        <span>Showing ${shown} of ${total} students</span>
+        ${allStudentsCursor ? '<button onclick="loadAllStudentsList(true)" class="btn-primary">Load More</button>' : ''}
+    `;
+}
+
 async function clearAllRequirements() {
     if (!confirm('Are you sure you want to clear ALL requirements? This will also revert all submitted clearances to pending status.')) {
         return;
     }
     
     try {
-        const response = await fetch('/api/clear-all-requirements', {
-            method: 'POST'
-        });
-        
-        const result = await response.json();
-        if (result.success) {
+        // Runs as a background job so a large roster cannot time out the request
+        const job = await runJob('clear_requirements', {}, 'clear-requirements-status');
+        if (job.status === 'done') {
             alert('All requirements cleared and submitted clearances reverted to pending.');
             loadAdminRequirements();
             loadStudentsList();
             loadSubmittedClearances();
         } else {
-            alert('Error: ' + result.message);
+            alert('Error: ' + job.message);
         }
     } catch (error) {
         console.error('Error clearing requirements:', error);
@@ -419,30 +763,108 @@ async function undoSubmission(studentId) {
     }
 }
 
-async function downloadAllClearances() {
+function downloadAllClearances() {
+    // Navigate instead of fetching into a blob so the browser streams the
+    // CSV straight to disk as the server generates it
+    window.location.href = '/download-all-clearances';
+}
+
+async function downloadAllCertificates() {
     try {
-        const response = await fetch('/download-all-clearances');
-        if (response.ok) {
-            const blob = await response.blob();
-            const url = window.URL.createObjectURL(blob);
-            const a = document.createElement('a');
-            a.href = url;
-            a.download = 'all_completed_clearances.csv';
-            document.body.appendChild(a);
-            a.click();
-            window.URL.revokeObjectURL(url);
-            document.body.removeChild(a);
+        // The ZIP is built by a background job; download it once it is ready
+        const job = await runJob('export_certificates', {}, 'export-status');
+        if (job.status === 'done') {
+            window.location.href = job.result_url;
         } else {
-            alert('Error downloading clearances');
+            alert('Error: ' + job.message);
         }
     } catch (error) {
-        console.error('Error downloading clearances:', error);
-        alert('Error downloading clearances');
+        console.error('Error exporting certificates:', error);
+        alert('Error exporting certificates');
+    }
+}
+
+// Background jobs
+// Queue a job, show its progress in the given element until it finishes,
+// and return the finished job.
+async function runJob(kind, params, statusId) {
+    const status = document.getElementById(statusId);
+    const response = await fetch('/api/jobs', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json'
+        },
+        body: JSON.stringify({ kind: kind, params: params })
+    });
+    const result = await response.json();
+    if (!result.success) {
+        throw new Error(result.message);
+    }
+    
+    let job = result.job;
+    while (job.status === 'queued' || job.status === 'running') {
+        status.textContent = formatJobStatus(job);
+        await new Promise(resolve => setTimeout(resolve, 1000));
+        const poll = await (await fetch(`/api/jobs/${job.id}`)).json();
+        if (!poll.success) {
+            throw new Error(poll.message);
+        }
+        job = poll.job;
+    }
+    status.textContent = job.status === 'done' ? (job.message || 'Done') : 'Failed: ' + job.message;
+    return job;
+}
+
+function formatJobStatus(job) {
+    if (job.status === 'queued') {
+        return 'Queued...';
+    }
+    return job.total ? `Working... ${job.progress} of ${job.total}` : 'Working...';
+}
+
+// Live updates
+function connectAdminEvents() {
+    if (!window.EventSource) {
+        // No push support - fall back to cheap periodic delta syncs
+        setInterval(syncStudentsList, 30000);
+        return;
+    }
+    const source = new EventSource('/api/events');
+    let connectedBefore = false;
+    source.addEventListener('open', () => {
+        // Catch up on anything missed while the stream was disconnected
+        if (connectedBefore) {
+            syncStudentsList();
+        }
+        connectedBefore = true;
+    });
+    source.addEventListener('student', e => applyStudentEvent(JSON.parse(e.data)));
+    source.addEventListener('reset', () => {
+        loadAdminRequirements();
+        loadStudentsList(studentsState.filters);
+        loadFilterFacets();
+    });
+}
+
+function applyStudentEvent(event) {
+    const student = studentsState.students[event.student_id];
+    if (!student) {
+        return;
+    }
+    if (event.clearance_submitted) {
+        removeStudentCard(event.student_id);
+        return;
     }
+    student.requirements = event.requirements;
+    student.completed_count = event.completed_count;
+    refreshStudentCard(event.student_id);
 }
 
 // Initialize when page loads
 document.addEventListener('DOMContentLoaded', function() {
     loadAdminRequirements();
     loadStudentsList();
+    loadFilterFacets();
+    connectAdminEvents();
+    document.getElementById('search-student-number').addEventListener('input', suggestStudents);
 });
\ No newline at end of file
@@ -1,41 +1,12 @@
 // Student Dashboard JavaScript
 
+let studentData = null;
+
 async function loadStudentRequirements() {
     try {
         const response = await fetch('/api/student-requirements');
         const data = await response.json();
-        
-        const container = document.getElementById('student-requirements');
-        container.innerHTML = '';
-        
-        if (!data.requirements || data.requirements.length === 0) {
-            container.innerHTML = '';
-            updateClearanceStatus(false, 0, 0, true); // Pass true for no requirements
-            return;
-        }
-        
-        data.requirements.forEach(req => {
-            const item = document.createElement('div');
-            item.className = `requirement-item ${req.completed ? 'completed' : ''}`;
-            
-            item.innerHTML = `
-                <input type="checkbox" disabled ${req.completed ? 'checked' : ''}>
-                <label>${req.name}</label>
-            `;
-            
-            container.appendChild(item);
-        });
-        
-        const completedCount = data.requirements.filter(r => r.completed).length;
-        const totalCount = data.requirements.length;
-        const allCompleted = completedCount === totalCount && totalCount > 0;
-        
-        updateClearanceStatus(data.clearance_submitted, completedCount, totalCount);
-        
-        // Show download button if clearance is submitted
-        const downloadBtn = document.getElementById('download-clearance-btn');
-        downloadBtn.style.display = data.clearance_submitted ? 'block' : 'none';
-        
+        renderStudentRequirements(data);
     } catch (error) {
         console.error('Error loading requirements:', error);
         document.getElementById('student-requirements').innerHTML = 
@@ -43,6 +14,62 @@ async function loadStudentRequirements() {
     }
 }
 
+function renderStudentRequirements(data) {
+    studentData = data;
+    
+    const container = document.getElementById('student-requirements');
+    container.innerHTML = '';
+    
+    if (!data.requirements || data.requirements.length === 0) {
+        container.innerHTML = '';
+        updateClearanceStatus(false, 0, 0, true); // Pass true for no requirements
+        return;
+    }
+    
+    data.requirements.forEach(req => {
+        const item = document.createElement('div');
+        item.className = `requirement-item ${req.completed ? 'completed' : ''}`;
+        
+        item.innerHTML = `
+            <input type="checkbox" disabled ${req.completed ? 'checked' : ''}>
+            <label>${req.name}</label>
+        `;
+        
+        container.appendChild(item);
+    });
+    
+    const completedCount = data.requirements.filter(r => r.completed).length;
+    const totalCount = data.requirements.length;
+    
+    updateClearanceStatus(data.clearance_submitted, completedCount, totalCount);
+    
+    // Show download button if clearance is submitted
+    const downloadBtn = document.getElementById('download-clearance-btn');
+    downloadBtn.style.display = data.clearance_submitted ? 'block' : 'none';
+}
+
+// Live updates - the server pushes this student's status when it changes
+function connectStudentEvents() {
+    if (!window.EventSource) {
+        return;
+    }
+    const source = new EventSource('/api/events');
+    source.addEventListener('student', e => {
+        const event = JSON.parse(e.data);
+        if (!studentData) {
+            loadStudentRequirements();
+            return;
+        }
+        const completed = {};
+        event.requirements.forEach(r => { completed[r.requirement_id] = r.completed; });
+        renderStudentRequirements({
+            requirements: studentData.requirements.map(req => ({ ...req, completed: !!completed[req.id] })),
+            clearance_submitted: event.clearance_submitted
+        });
+    });
+    source.addEventListener('reset', () => loadStudentRequirements());
+}
+
 function updateClearanceStatus(submitted, completed, total, noRequirements = false) {
     const statusDiv = document.getElementById('clearance-status');
     
@@ -98,4 +125,5 @@ async function downloadClearance() {
 // Initialize when page loads
 document.addEventListener('DOMContentLoaded', function() {
     loadStudentRequirements();
+    connectStudentEvents();
 });
\ No newline at end of file